@@ -0,0 +1,203 @@
+"""Non-interactive benchmark for the four metaheuristic solvers.
+
+Run a matrix of board sizes and bundled parameter sets and write the results
+as JSON::
+
+    python Benchmark.py run --sizes 8 12 16 --sets 1 2 --runs 10 --output bench.json
+
+Compare two result files and flag regressions (exit status 1 if any)::
+
+    python Benchmark.py compare baseline.json bench.json --threshold 0.1
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+import nQueen_ACO
+import nQueen_BEE
+import nQueen_GE
+import nQueen_Hybrid
+import nQueen_PS0
+from Instrumentation import Instrumentation
+from Multi_run import is_solution, run_seeds
+
+
+def run_bees(n, params, instrumentation=None):
+    return nQueen_BEE.bees_algorithm(n, **params, instrumentation=instrumentation)
+
+
+def run_ga(n, params, instrumentation=None):
+    return nQueen_GE.genetic_algorithm(n, **params, instrumentation=instrumentation)
+
+
+def run_pso(n, params, instrumentation=None):
+    return nQueen_PS0.PSO(params["num_particles"], n, params["num_iterations"], params["w"], params["c1"], params["c2"],
+                          1, np.arange(n), processes=1, instrumentation=instrumentation)[0]
+
+
+def run_aco(n, params, instrumentation=None):
+    return nQueen_ACO.ACO(n, **params).run(instrumentation=instrumentation)
+
+
+def run_hybrid(n, params, instrumentation=None):
+    return nQueen_Hybrid.hybrid(n, **params, instrumentation=instrumentation)
+
+
+# Solver name -> (parameter sets, single-run function)
+SOLVERS = {
+    "bees": (nQueen_BEE.BEE_ALGORITHM_PARAMETER_SETS, run_bees),
+    "ga": (nQueen_GE.GA_PARAMETER_SETS, run_ga),
+    "pso": (nQueen_PS0.PARAMETER_SETS, run_pso),
+    "aco": (nQueen_ACO.ACO_PARAMETER_SETS, run_aco),
+    "hybrid": (nQueen_Hybrid.HYBRID_PARAMETER_SETS, run_hybrid),
+}
+
+# Every parameter set number bundled with at least one solver
+PARAMETER_SET_CHOICES = sorted(set().union(*(parameter_sets for parameter_sets, _ in SOLVERS.values())))
+
+
+def benchmark(solver, n, parameter_set, runs, seed):
+    """Run one configuration and return its result record."""
+    parameter_sets, run_once = SOLVERS[solver]
+    params = parameter_sets[parameter_set]
+    seeds = run_seeds(runs, seed)
+    instrumentation = Instrumentation()
+    successes = 0
+    wall_time = 0.0
+    evaluations = 0
+    time_to_first_solution = None
+
+    for run_seed in seeds:
+        random.seed(run_seed)
+        np.random.seed(run_seed)
+        start = time.perf_counter()
+        solution = run_once(n, params, instrumentation)
+        wall_time += time.perf_counter() - start
+        evaluations += instrumentation.traces[-1]["evaluations"]
+        if is_solution(solution):
+            successes += 1
+            if time_to_first_solution is None:
+                time_to_first_solution = wall_time
+
+    # Peak memory comes from one extra traced run so tracing does not skew the timings
+    random.seed(seeds[0])
+    np.random.seed(seeds[0])
+    tracemalloc.start()
+    run_once(n, params, instrumentation)
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        "solver": solver,
+        "n": n,
+        "parameter_set": parameter_set,
+        "runs": runs,
+        "successes": successes,
+        "success_rate": successes / runs,
+        "wall_time": wall_time,
+        "mean_run_time": wall_time / runs,
+        "evaluations": evaluations,
+        "evaluations_per_second": evaluations / wall_time if wall_time else 0.0,
+        "time_to_first_solution": time_to_first_solution,
+        "peak_memory_bytes": peak_memory,
+    }
+
+
+def run_benchmarks(solvers, sizes, parameter_sets, runs, seed):
+    """Run every (solver, n, parameter set) combination and return the result document.
+
+    Parameter sets a solver does not bundle are skipped with a note on stderr.
+    """
+    results = []
+    for solver in solvers:
+        for n in sizes:
+            for parameter_set in parameter_sets:
+                if parameter_set not in SOLVERS[solver][0]:
+                    print(f"{solver:5} n={n:<4} set={parameter_set} skipped: {solver} has no parameter set {parameter_set}",
+                          file=sys.stderr)
+                    continue
+                record = benchmark(solver, n, parameter_set, runs, seed)
+                print(f"{solver:5} n={n:<4} set={parameter_set} success={record['success_rate']:.2f} "
+                      f"time={record['wall_time']:.2f}s evals/s={record['evaluations_per_second']:.0f}", file=sys.stderr)
+                results.append(record)
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "seed": seed,
+            "runs": runs,
+        },
+        "results": results,
+    }
+
+
+def compare(baseline, current, threshold):
+    """Return a list of regression messages between two result documents."""
+    key = lambda record: (record["solver"], record["n"], record["parameter_set"])
+    before = {key(record): record for record in baseline["results"]}
+    regressions = []
+    for record in current["results"]:
+        old = before.get(key(record))
+        if old is None:
+            continue
+        label = "{} n={} set={}".format(*key(record))
+        if record["mean_run_time"] > old["mean_run_time"] * (1 + threshold):
+            regressions.append(f"{label}: mean run time {old['mean_run_time']:.4f}s -> {record['mean_run_time']:.4f}s")
+        if record["evaluations_per_second"] < old["evaluations_per_second"] * (1 - threshold):
+            regressions.append(f"{label}: evaluations/s {old['evaluations_per_second']:.0f} -> {record['evaluations_per_second']:.0f}")
+        if record["success_rate"] < old["success_rate"] - threshold:
+            regressions.append(f"{label}: success rate {old['success_rate']:.2f} -> {record['success_rate']:.2f}")
+        if record["peak_memory_bytes"] > old["peak_memory_bytes"] * (1 + threshold):
+            regressions.append(f"{label}: peak memory {old['peak_memory_bytes']} -> {record['peak_memory_bytes']} bytes")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the N-Queens solvers.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the benchmark matrix")
+    run_parser.add_argument("--solvers", nargs="+", choices=sorted(SOLVERS), default=sorted(SOLVERS))
+    run_parser.add_argument("--sizes", nargs="+", type=int, default=[8, 12, 16])
+    run_parser.add_argument("--sets", nargs="+", type=int, choices=PARAMETER_SET_CHOICES, default=[1])
+    run_parser.add_argument("--runs", type=int, default=5)
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--output", default="-", help="result file, or - for stdout")
+
+    compare_parser = commands.add_parser("compare", help="flag regressions between two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.1, help="allowed relative slowdown")
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        document = run_benchmarks(args.solvers, args.sizes, args.sets, args.runs, args.seed)
+        text = json.dumps(document, indent=2)
+        if args.output == "-":
+            print(text)
+        else:
+            with open(args.output, "w") as handle:
+                handle.write(text + "\n")
+        return 0
+
+    with open(args.baseline) as handle:
+        baseline = json.load(handle)
+    with open(args.current) as handle:
+        current = json.load(handle)
+    regressions = compare(baseline, current, args.threshold)
+    for message in regressions:
+        print("REGRESSION", message)
+    if not regressions:
+        print("No regressions.")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+"""Common stopping budget for the solver main loops.
+
+A Budget starts counting when it is created and is shared by all runs it is
+passed to. Solvers call ``exhausted(best_cost)`` once per iteration, which
+costs one clock read and a couple of comparisons, and stop their loop when it
+returns True. Costs are numbers of attacking pairs, so a target cost of 0
+means "stop at the first solution".
+
+With ``anytime`` set, solvers that would otherwise return None when no valid
+board was found return their best-so-far board instead.
+"""
+import time
+
+import Conflict_count
+
+
+class Budget:
+    """Wall-clock, evaluation and target-cost limits; any of them may be None."""
+
+    def __init__(self, time_limit=None, max_evaluations=None, target_cost=None, anytime=False):
+        self.time_limit = time_limit
+        self.max_evaluations = max_evaluations
+        self.target_cost = target_cost
+        self.anytime = anytime
+        self.restart()
+
+    def restart(self):
+        """Start counting time and evaluations from now."""
+        self.deadline = None if self.time_limit is None else time.perf_counter() + self.time_limit
+        self.charged = 0
+        self._evaluations_at_start = Conflict_count.evaluations
+
+    def charge(self, evaluations):
+        """Count evaluations done outside this process, e.g. in PSO worker processes."""
+        self.charged += evaluations
+
+    @property
+    def evaluations(self):
+        return Conflict_count.evaluations - self._evaluations_at_start + self.charged
+
+    def remaining_time(self):
+        """Seconds left before the deadline, or None without a time limit."""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.perf_counter())
+
+    def exhausted(self, best_cost=None):
+        """Return True once any limit is reached or best_cost meets the target."""
+        if self.target_cost is not None and best_cost is not None and best_cost <= self.target_cost:
+            return True
+        if self.deadline is not None and time.perf_counter() >= self.deadline:
+            return True
+        if self.max_evaluations is not None and self.evaluations >= self.max_evaluations:
+            return True
+        return False
+
+
+class _Unlimited:
+    """Budget used when none is given; it is never exhausted."""
+
+    anytime = False
+
+    def charge(self, evaluations):
+        pass
+
+    def remaining_time(self):
+        return None
+
+    def exhausted(self, best_cost=None):
+        return False
+
+
+UNLIMITED = _Unlimited()
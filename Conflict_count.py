@@ -0,0 +1,229 @@
+"""Shared conflict counting for the N-Queens solvers.
+
+A board is a sequence where ``positions[col]`` is the row of the queen in
+column ``col``. Two queens attack each other when they share a row, a
+diagonal (row - col) or an anti-diagonal (row + col); no pair can share more
+than one of these lines, so counting queens per line gives the exact number
+of attacking pairs in O(n).
+"""
+import numpy as np
+
+# Boards scored in full in this process so far; read by Instrumentation
+evaluations = 0
+
+
+def attacking_pairs(positions):
+    """Return the number of attacking pairs of queens on the board."""
+    global evaluations
+    evaluations += 1
+    n = len(positions)
+    if n == 0:
+        return 0
+    if isinstance(positions, np.ndarray):
+        return _attacking_pairs_array(positions)
+
+    low = min(positions)
+    span = max(positions) - low + 1
+    rows = [0] * span
+    diagonals = [0] * (span + n)
+    anti_diagonals = [0] * (span + n)
+    attacks = 0
+    # Each queen attacks every queen already placed on one of its lines
+    for col, row in enumerate(positions):
+        row -= low
+        diagonal = row - col + n
+        anti_diagonal = row + col
+        attacks += rows[row] + diagonals[diagonal] + anti_diagonals[anti_diagonal]
+        rows[row] += 1
+        diagonals[diagonal] += 1
+        anti_diagonals[anti_diagonal] += 1
+    return attacks
+
+
+def _attacking_pairs_array(positions):
+    """Vectorised version of attacking_pairs() for a 1-D NumPy board."""
+    n = len(positions)
+    rows = positions.astype(np.int64) - positions.min()
+    cols = np.arange(n)
+    attacks = 0
+    for line in (rows, rows - cols + n, rows + cols):
+        counts = np.bincount(line)
+        attacks += int((counts * (counts - 1)).sum()) // 2
+    return attacks
+
+
+def line_counts_batch(lines, stride):
+    """Return the number of queens on each line of every board, from a 2-D array of line numbers in range(stride).
+
+    Every board is shifted into its own block of stride bins, so one bincount
+    covers the batch. The result has one row of stride counts per board.
+    """
+    num_boards = len(lines)
+    offsets = np.arange(num_boards)[:, None] * stride
+    return np.bincount((lines + offsets).ravel(), minlength=num_boards * stride).reshape(num_boards, stride)
+
+
+def attacking_pairs_batch(boards):
+    """Return the attacking pair count of every row of a 2-D array of boards."""
+    global evaluations
+    boards = np.asarray(boards, dtype=np.int64)
+    num_boards, n = boards.shape
+    evaluations += num_boards
+    if n == 0:
+        return np.zeros(num_boards, dtype=np.int64)
+    rows = boards - boards.min()
+    stride = int(rows.max()) + 1 + 2 * n
+    cols = np.arange(n)
+    attacks = np.zeros(num_boards, dtype=np.int64)
+    for line in (rows, rows - cols + n, rows + cols):
+        counts = line_counts_batch(line, stride)
+        attacks += (counts * (counts - 1) // 2).sum(axis=1)
+    return attacks
+
+
+def diagonal_pairs_batch(permutations):
+    """Return the attacking pair count of every row of a 2-D array of permutations of range(n).
+
+    A permutation has one queen per row, so only the diagonals are counted.
+    """
+    global evaluations
+    rows = np.asarray(permutations, dtype=np.int64)
+    num_boards, n = rows.shape
+    evaluations += num_boards
+    if n == 0:
+        return np.zeros(num_boards, dtype=np.int64)
+    stride = 2 * n - 1
+    cols = np.arange(n)
+    attacks = np.zeros(num_boards, dtype=np.int64)
+    for line in (rows - cols + n - 1, rows + cols):
+        counts = line_counts_batch(line, stride)
+        attacks += (counts * (counts - 1) // 2).sum(axis=1)
+    return attacks
+
+
+class DiagonalCounter:
+    """Preallocated workspace for counting the diagonal pairs of batches of up to capacity permutations of range(n).
+
+    Calling it gives the same counts as diagonal_pairs_batch() without
+    allocating: the result is a view of the workspace, valid until the next call.
+    """
+
+    def __init__(self, capacity, n):
+        stride = 2 * n - 1
+        blocks = np.arange(capacity)[:, None] * stride
+        # Bin of each (board, column) pair for a row of 0, shifted into the board's own block of bins
+        self.diagonal_bins = blocks + n - 1 - np.arange(n)
+        self.anti_diagonal_bins = blocks + np.arange(n)
+        self.stride = stride
+        self.lines = np.empty((capacity, n), dtype=np.intp)
+        self.counts = np.empty(capacity * stride, dtype=np.intp)
+        self.pairs = np.empty(capacity * stride, dtype=np.intp)
+        self.attacks = np.empty(capacity, dtype=np.int64)
+        self.line_attacks = np.empty(capacity, dtype=np.int64)
+
+    def __call__(self, permutations):
+        global evaluations
+        num_boards = len(permutations)
+        evaluations += num_boards
+        size = num_boards * self.stride
+        lines, counts, pairs = self.lines[:num_boards], self.counts[:size], self.pairs[:size]
+        attacks, line_attacks = self.attacks[:num_boards], self.line_attacks[:num_boards]
+        attacks[:] = 0
+        for bins in (self.diagonal_bins, self.anti_diagonal_bins):
+            np.add(permutations, bins[:num_boards], out=lines)
+            counts[:] = 0
+            np.add.at(counts, lines.reshape(-1), 1)
+            # k queens on a line make k * (k - 1) / 2 pairs; the halving is done once at the end
+            np.subtract(counts, 1, out=pairs)
+            np.multiply(pairs, counts, out=pairs)
+            pairs.reshape(num_boards, self.stride).sum(axis=1, out=line_attacks)
+            attacks += line_attacks
+        attacks //= 2
+        return attacks
+
+
+def max_pairs(n):
+    """Return the number of queen pairs on an n x n board, n * (n - 1) / 2."""
+    return n * (n - 1) // 2
+
+
+def non_attacking_pairs(positions):
+    """Return the number of non-attacking pairs of queens on the board."""
+    return max_pairs(len(positions)) - attacking_pairs(positions)
+
+
+class Board:
+    """Board with row and diagonal counters for O(1) move and swap updates.
+
+    Rows must lie in range(n). ``cost`` always holds the current number of
+    attacking pairs.
+    """
+
+    def __init__(self, positions):
+        global evaluations
+        evaluations += 1
+        n = len(positions)
+        self.n = n
+        self.positions = [int(row) for row in positions]
+        self.rows = [0] * n
+        self.diagonals = [0] * (2 * n - 1)
+        self.anti_diagonals = [0] * (2 * n - 1)
+        for col, row in enumerate(self.positions):
+            self.rows[row] += 1
+            self.diagonals[row - col + n - 1] += 1
+            self.anti_diagonals[row + col] += 1
+        self.cost = sum(k * (k - 1) // 2 for counts in (self.rows, self.diagonals, self.anti_diagonals) for k in counts)
+
+    def attacks_at(self, col, row):
+        """Return how many queens attack the square (col, row), ignoring the queen in col."""
+        current = self.positions[col]
+        attacks = self.rows[row] + self.diagonals[row - col + self.n - 1] + self.anti_diagonals[row + col]
+        if row == current:
+            attacks -= 3
+        return attacks
+
+    def conflicts(self, col):
+        """Return how many queens attack the queen in column col."""
+        return self.attacks_at(col, self.positions[col])
+
+    def move_delta(self, col, row):
+        """Return the change in cost if the queen in column col moved to row."""
+        if row == self.positions[col]:
+            return 0
+        return self.attacks_at(col, row) - self.conflicts(col)
+
+    def move(self, col, row):
+        """Move the queen in column col to row and return the change in cost."""
+        current = self.positions[col]
+        if row == current:
+            return 0
+        n = self.n
+        delta = self.move_delta(col, row)
+        self.rows[current] -= 1
+        self.diagonals[current - col + n - 1] -= 1
+        self.anti_diagonals[current + col] -= 1
+        self.rows[row] += 1
+        self.diagonals[row - col + n - 1] += 1
+        self.anti_diagonals[row + col] += 1
+        self.positions[col] = row
+        self.cost += delta
+        return delta
+
+    def swap_delta(self, i, j):
+        """Return the change in cost if the queens in columns i and j swapped rows."""
+        row_i, row_j = self.positions[i], self.positions[j]
+        if row_i == row_j:
+            return 0
+        n = self.n
+        # Rows are unchanged by a swap; only the row counts of the two vacated squares drop
+        added = (self.rows[row_j] - 1 + self.diagonals[row_j - i + n - 1] + self.anti_diagonals[row_j + i]
+                 + self.rows[row_i] - 1 + self.diagonals[row_i - j + n - 1] + self.anti_diagonals[row_i + j])
+        removed = self.conflicts(i) + self.conflicts(j)
+        # A pair on a shared diagonal stays on one after the swap and is counted by both sides
+        mutual = 2 if abs(row_i - row_j) == abs(i - j) else 0
+        return added - removed + mutual
+
+    def swap(self, i, j):
+        """Swap the rows of the queens in columns i and j and return the change in cost."""
+        row_i, row_j = self.positions[i], self.positions[j]
+        return self.move(i, row_j) + self.move(j, row_i)
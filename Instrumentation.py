@@ -0,0 +1,135 @@
+"""Optional instrumentation for the solver main loops.
+
+Every solver accepts ``instrumentation=None``. Passing an Instrumentation
+counts fitness evaluations, times the phases of the main loop and records
+the best-so-far cost (attacking pairs) after each iteration; a trace is
+emitted through ``trace_hook`` at the end of every run. Without one the
+solvers use NULL_INSTRUMENTATION, whose methods do nothing.
+
+Setting the NQUEEN_TRACE environment variable to a file path instruments
+every run that was not given an Instrumentation and appends its trace to
+that file as one JSON line, so production jobs can be profiled without
+editing the scripts.
+"""
+import json
+import os
+import time
+from collections import defaultdict
+
+import Conflict_count
+
+TRACE_ENV_VAR = "NQUEEN_TRACE"
+
+
+class _Phase:
+    """Context manager adding the time spent inside it to one phase."""
+
+    __slots__ = ("instrumentation", "name", "started")
+
+    def __init__(self, instrumentation, name):
+        self.instrumentation = instrumentation
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.instrumentation.phase_times[self.name] += time.perf_counter() - self.started
+        return False
+
+
+class _NullPhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+class Instrumentation:
+    """Per-run counters, phase timings and best-cost history for one solver."""
+
+    def __init__(self, trace_hook=None, **labels):
+        self.trace_hook = trace_hook
+        self.labels = labels
+        self.traces = []
+        self.start("")
+
+    def start(self, solver, **info):
+        """Reset the counters at the beginning of a run."""
+        self.solver = solver
+        self.info = info
+        self.phase_times = defaultdict(float)
+        self.best_costs = []
+        self._started = time.perf_counter()
+        self._evaluations_at_start = Conflict_count.evaluations
+
+    def phase(self, name):
+        return _Phase(self, name)
+
+    def iteration(self, best_cost):
+        self.best_costs.append(best_cost)
+
+    @property
+    def evaluations(self):
+        return Conflict_count.evaluations - self._evaluations_at_start
+
+    def finish(self, **info):
+        """End the run, emit its trace through the hook and return it."""
+        trace = dict(self.labels)
+        trace.update(self.info)
+        trace.update(info)
+        trace.update({
+            "solver": self.solver,
+            "wall_time": time.perf_counter() - self._started,
+            "evaluations": self.evaluations,
+            "iterations": len(self.best_costs),
+            "phase_times": dict(self.phase_times),
+            "best_costs": list(self.best_costs),
+        })
+        self.traces.append(trace)
+        if self.trace_hook is not None:
+            self.trace_hook(trace)
+        return trace
+
+
+class _NullInstrumentation:
+    """Stand-in used when instrumentation is off; every call is a no-op."""
+
+    _phase = _NullPhase()
+    evaluations = 0
+
+    def start(self, solver, **info):
+        pass
+
+    def phase(self, name):
+        return self._phase
+
+    def iteration(self, best_cost):
+        pass
+
+    def finish(self, **info):
+        return None
+
+
+NULL_INSTRUMENTATION = _NullInstrumentation()
+
+
+def jsonl_trace_hook(path):
+    """Return a trace hook appending each trace to path as one JSON line."""
+    def write(trace):
+        with open(path, "a") as handle:
+            handle.write(json.dumps(trace) + "\n")
+    return write
+
+
+def resolve(instrumentation):
+    """Return the instrumentation a solver should use for the given argument."""
+    if instrumentation is not None:
+        return instrumentation
+    path = os.environ.get(TRACE_ENV_VAR)
+    if path:
+        return Instrumentation(trace_hook=jsonl_trace_hook(path), pid=os.getpid())
+    return NULL_INSTRUMENTATION
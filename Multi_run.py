@@ -0,0 +1,71 @@
+"""Parallel driver for independent runs of any of the N-Queens solvers.
+
+Each run gets its own seed for ``random`` and ``numpy.random``, so a set of
+runs is reproducible whatever order the workers finish in.
+"""
+import random
+from multiprocessing import Pool, cpu_count
+
+import numpy as np
+
+from Symmetry import DistinctSolutions
+from Validity_check import is_valid_solution
+
+
+def run_seeds(num_runs, seed=None):
+    """Return one independent 32-bit seed per run, derived from seed."""
+    return [int(child.generate_state(1)[0]) for child in np.random.SeedSequence(seed).spawn(num_runs)]
+
+
+def _seeded_run(job):
+    """Seed the global generators and call the solver for one run."""
+    run, run_seed, solver, args, kwargs = job
+    random.seed(run_seed)
+    np.random.seed(run_seed)
+    return run, solver(*args, **kwargs)
+
+
+def is_solution(solution):
+    """Return True if a solver result is a board with no attacking queens."""
+    return solution is not None and len(solution) > 0 and is_valid_solution(solution, base=0)
+
+
+def run_many(solver, num_runs, args=(), kwargs=None, seed=None, processes=None, target_solutions=None, distinct=None,
+             writer=None):
+    """Run solver(*args, **kwargs) num_runs times and yield (run, solution) as each run finishes.
+
+    Runs are spread over a process pool of ``processes`` workers (all cores by
+    default); with one process they run in order in the calling process. Valid
+    solutions are collected in ``distinct`` (a DistinctSolutions, created if not
+    given), and each one that starts a new class is written to ``writer`` (a
+    Solution_output.SolutionWriter) as soon as its run finishes. When
+    ``target_solutions`` is given, the remaining runs are cancelled once that
+    many distinct symmetry classes have been found. Pool workers are daemonic
+    and may not start processes of their own, so solvers run here must not
+    start workers (the island GA refuses to; the others fall back to one process).
+    """
+    kwargs = kwargs or {}
+    if processes is None:
+        processes = cpu_count()
+    processes = max(1, min(processes, num_runs))
+    jobs = [(run, run_seed, solver, args, kwargs) for run, run_seed in enumerate(run_seeds(num_runs, seed))]
+    if distinct is None:
+        distinct = DistinctSolutions()
+
+    if processes == 1:
+        results = map(_seeded_run, jobs)
+        pool = None
+    else:
+        pool = Pool(processes=processes)
+        results = pool.imap_unordered(_seeded_run, jobs)
+    try:
+        for run, solution in results:
+            if distinct.add(solution) and writer is not None:
+                writer.write(solution, run=run)
+            yield run, solution
+            if target_solutions is not None and len(distinct) >= target_solutions:
+                break
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
@@ -0,0 +1,139 @@
+"""Shared-memory board buffers for process-parallel evaluation.
+
+A SharedBoards block holds a (capacity, n) array of boards and one score
+per board in a single ``multiprocessing.shared_memory`` segment. Worker
+processes attach to the segment by name, so boards and scores never cross a
+pipe: the parent writes candidates into the block, each worker scores its
+slice in place and only a short "done" message comes back.
+
+SharedScorer runs such a worker pool and offers ``attacking_pairs_batch()``
+with the same meaning as the function in Conflict_count, so it can be passed
+as the ``scorer`` of the GA population, the PSO swarm or the ACO ant batch.
+Callers that build their boards directly in ``scorer.boards`` skip even the
+one copy into the block.
+"""
+from multiprocessing import Pipe, Process, cpu_count, shared_memory
+
+import numpy as np
+
+import Conflict_count
+
+
+def _attach(name):
+    """Attach to an existing segment without making this process responsible for unlinking it."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        # Workers share the parent's resource tracker, so registering the name again is harmless,
+        # while unregistering it here would drop the parent's own registration
+        return shared_memory.SharedMemory(name=name)
+
+
+class SharedBoards:
+    """A (capacity, n) board array and a score per board in one shared-memory segment.
+
+    With no ``name`` a new segment is created and owned by this object;
+    otherwise the named segment is attached. ``spec`` is what another process
+    needs to attach.
+    """
+
+    def __init__(self, capacity, n, dtype=np.int64, name=None):
+        self.capacity = capacity
+        self.n = n
+        self.dtype = np.dtype(dtype)
+        scores_size = 8 * capacity  # int64 scores first, so both arrays stay aligned
+        size = scores_size + self.dtype.itemsize * capacity * n
+        self.owner = name is None
+        self.memory = shared_memory.SharedMemory(create=True, size=max(size, 1)) if self.owner else _attach(name)
+        self.scores = np.ndarray((capacity,), dtype=np.int64, buffer=self.memory.buf)
+        self.boards = np.ndarray((capacity, n), dtype=self.dtype, buffer=self.memory.buf, offset=scores_size)
+
+    @property
+    def spec(self):
+        return self.capacity, self.n, self.dtype.str, self.memory.name
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+    def close(self):
+        """Release the views and the segment; the owner also removes the segment."""
+        del self.scores, self.boards
+        try:
+            self.memory.close()
+        except BufferError:
+            pass  # Views of the boards are still held elsewhere; the mapping is released with them
+        if self.owner:
+            self.memory.unlink()
+
+
+def _score_worker(connection, spec):
+    """Worker process: score slices of the shared boards in place until told to close."""
+    capacity, n, dtype, name = spec
+    shared = SharedBoards(capacity, n, dtype, name=name)
+    while True:
+        message = connection.recv()
+        if message is None:
+            break
+        start, stop = message
+        if stop > start:
+            shared.scores[start:stop] = Conflict_count.attacking_pairs_batch(shared.boards[start:stop])
+        connection.send(True)
+    shared.close()
+    connection.close()
+
+
+class SharedScorer:
+    """Pool of worker processes scoring up to capacity boards of size n in shared memory."""
+
+    def __init__(self, capacity, n, processes=None, dtype=np.int64):
+        self.shared = SharedBoards(capacity, n, dtype)
+        self.boards = self.shared.boards
+        processes = max(1, min(processes or cpu_count(), capacity))
+        self.connections = []
+        self.workers = []
+        for _ in range(processes):
+            parent_connection, child_connection = Pipe()
+            worker = Process(target=_score_worker, args=(child_connection, self.shared.spec), daemon=True)
+            worker.start()
+            child_connection.close()
+            self.connections.append(parent_connection)
+            self.workers.append(worker)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+    def attacking_pairs_batch(self, boards):
+        """Return the attacking pair count of every row of a 2-D array of boards, scored by the workers."""
+        count = len(boards)
+        if count > self.shared.capacity or (count and np.shape(boards)[1] != self.shared.n):
+            raise ValueError(f"Expected at most {self.shared.capacity} boards of size {self.shared.n}, got shape {np.shape(boards)}.")
+        # Boards built in place at the start of self.boards need no copy
+        if not (isinstance(boards, np.ndarray) and boards.dtype == self.boards.dtype
+                and boards.ctypes.data == self.boards.ctypes.data):
+            self.boards[:count] = boards
+        bounds = np.linspace(0, count, len(self.connections) + 1).astype(int)
+        for connection, start, stop in zip(self.connections, bounds[:-1], bounds[1:]):
+            connection.send((int(start), int(stop)))
+        for connection in self.connections:
+            connection.recv()
+        Conflict_count.evaluations += count  # Counted here so budgets and instrumentation see them
+        return self.shared.scores[:count].copy()
+
+    def close(self):
+        for connection in self.connections:
+            connection.send(None)
+            connection.close()
+        for worker in self.workers:
+            worker.join()
+        self.connections = []
+        self.workers = []
+        del self.boards
+        self.shared.close()
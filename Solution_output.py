@@ -0,0 +1,86 @@
+"""Streaming output of N-Queens solutions as compact records.
+
+Solutions are written one record at a time as they are found, so nothing
+proportional to n² is ever built. Two formats are supported:
+
+``jsonl``
+    One JSON object per line, ``{"n": 8, "solution": [4, 6, 8, 2, 7, 1, 3, 5], ...}``,
+    with 1-based rows like the scripts print them and any extra fields passed
+    to ``write()`` (algorithm, run, elapsed time, ...).
+
+``binary``
+    Packed permutations: for each record a little-endian 32-bit n followed by
+    the n 0-based rows in the Solution_store packing, four bytes per queen.
+
+The target is a file path or ``"-"`` for standard output.
+"""
+import json
+import struct
+import sys
+
+from Solution_store import pack, unpack
+
+FORMATS = ("jsonl", "binary")
+
+_LENGTH = struct.Struct("<I")
+
+
+class SolutionWriter:
+    """Write solutions to a file or standard output as they are found."""
+
+    def __init__(self, target="-", format="jsonl"):
+        if format not in FORMATS:
+            raise ValueError(f"Unknown output format {format!r}; choose from {list(FORMATS)}")
+        self.format = format
+        self.written = 0
+        binary = format == "binary"
+        if target == "-":
+            self.stream = sys.stdout.buffer if binary else sys.stdout
+            self._owned = False
+        else:
+            self.stream = open(target, "wb" if binary else "w")
+            self._owned = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+    def write(self, solution, **info):
+        """Write one 0-based solution; extra keyword fields are kept in JSON records only."""
+        if self.format == "binary":
+            self.stream.write(_LENGTH.pack(len(solution)))
+            self.stream.write(pack(solution))
+        else:
+            record = {"n": len(solution), "solution": [int(row) + 1 for row in solution]}
+            record.update(info)
+            self.stream.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self.stream.flush()
+        self.written += 1
+
+    def close(self):
+        if self._owned:
+            self.stream.close()
+        else:
+            self.stream.flush()
+
+
+def read_binary(source):
+    """Yield the 0-based solutions from a path or binary stream written in the binary format."""
+    if isinstance(source, str):
+        with open(source, "rb") as stream:
+            yield from read_binary(stream)
+        return
+    while True:
+        header = source.read(_LENGTH.size)
+        if not header:
+            return
+        if len(header) < _LENGTH.size:
+            raise ValueError("Truncated record header in binary solution stream.")
+        (n,) = _LENGTH.unpack(header)
+        data = source.read(4 * n)
+        if len(data) < 4 * n:
+            raise ValueError("Truncated solution in binary solution stream.")
+        yield unpack(data)
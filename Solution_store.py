@@ -0,0 +1,162 @@
+"""Persistent on-disk store of N-Queens solutions, keyed by board size.
+
+Solutions live in an SQLite file. Each one is stored once per symmetry
+class: the primary key is (n, canonical form), so rotations and reflections
+of a stored solution are recognised as duplicates. Boards are packed as
+little-endian 32-bit row numbers, four bytes per queen.
+
+The store can be capped per board size and in total; when a cap is exceeded
+the least recently used solutions are evicted first.
+"""
+import sqlite3
+import sys
+import time
+from array import array
+
+import numpy as np
+
+from Symmetry import canonical_form
+from Validity_check import is_valid_solution
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS solutions (
+    n INTEGER NOT NULL,
+    canonical BLOB NOT NULL,
+    solution BLOB NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (n, canonical)
+);
+CREATE INDEX IF NOT EXISTS solutions_lru ON solutions (n, last_used);
+"""
+
+# Fraction of the queens moved in each warm-start board
+WARM_START_SHUFFLE = 0.25
+
+
+def pack(solution):
+    """Pack a board into bytes, four little-endian bytes per queen."""
+    packed = array('i', (int(row) for row in solution))
+    if sys.byteorder != 'little':
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def unpack(data):
+    """Inverse of pack()."""
+    packed = array('i')
+    packed.frombytes(data)
+    if sys.byteorder != 'little':
+        packed.byteswap()
+    return packed.tolist()
+
+
+def warm_start_boards(solutions, count=None, rng=np.random):
+    """Return starting boards near up to count of the given solutions, as lists of 0-based rows.
+
+    Each board is a solution whose rows are rotated round a random cycle of
+    WARM_START_SHUFFLE of its columns (at least two), so a solver seeded with
+    it starts close to a known solution without being handed that solution.
+    ``rng`` is numpy.random or a numpy Generator.
+    """
+    boards = []
+    for solution in list(solutions or [])[:count]:
+        board = np.array(solution, dtype=np.int64)
+        cols = rng.permutation(len(board))[:max(2, int(len(board) * WARM_START_SHUFFLE))]
+        board[cols] = board[np.roll(cols, 1)]
+        boards.append(board.tolist())
+    return boards
+
+
+class SolutionStore:
+    """SQLite-backed, symmetry-deduplicated store of valid solutions."""
+
+    def __init__(self, path="nqueens_solutions.db", max_per_size=None, max_total=None):
+        self.path = path
+        self.max_per_size = max_per_size
+        self.max_total = max_total
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(_SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+    def close(self):
+        self.connection.close()
+
+    def add(self, solution):
+        """Store a solution; return True if its symmetry class was new.
+
+        Boards that are not valid solutions are ignored and return False.
+        """
+        return self.add_many([solution]) == 1
+
+    def add_many(self, solutions):
+        """Store several solutions in one transaction and return how many classes were new."""
+        added = 0
+        sizes = set()
+        now = time.time()
+        with self.connection:
+            for solution in solutions:
+                if solution is None or len(solution) == 0 or not is_valid_solution(solution, base=0):
+                    continue
+                n = len(solution)
+                cursor = self.connection.execute(
+                    "INSERT OR IGNORE INTO solutions (n, canonical, solution, last_used) VALUES (?, ?, ?, ?)",
+                    (n, pack(canonical_form(solution)), pack(solution), now))
+                added += cursor.rowcount
+                sizes.add(n)
+            for n in sizes:
+                self._evict(n)
+        return added
+
+    def _evict(self, n):
+        """Drop least recently used solutions until the caps hold."""
+        if self.max_per_size is not None:
+            self.connection.execute(
+                "DELETE FROM solutions WHERE n = ? AND canonical NOT IN "
+                "(SELECT canonical FROM solutions WHERE n = ? ORDER BY last_used DESC LIMIT ?)",
+                (n, n, self.max_per_size))
+        if self.max_total is not None:
+            self.connection.execute(
+                "DELETE FROM solutions WHERE rowid NOT IN "
+                "(SELECT rowid FROM solutions ORDER BY last_used DESC LIMIT ?)",
+                (self.max_total,))
+
+    def solutions(self, n, limit=None):
+        """Return up to limit stored solutions for board size n, most recently used first."""
+        query = "SELECT canonical, solution FROM solutions WHERE n = ? ORDER BY last_used DESC"
+        parameters = (n,)
+        if limit is not None:
+            query += " LIMIT ?"
+            parameters = (n, limit)
+        rows = self.connection.execute(query, parameters).fetchall()
+        if rows:
+            with self.connection:
+                self.connection.executemany(
+                    "UPDATE solutions SET last_used = ? WHERE n = ? AND canonical = ?",
+                    [(time.time(), n, canonical) for canonical, _ in rows])
+        return [unpack(solution) for _, solution in rows]
+
+    def __contains__(self, solution):
+        """True if the symmetry class of the solution is stored."""
+        key = (len(solution), pack(canonical_form(solution)))
+        return self.connection.execute("SELECT 1 FROM solutions WHERE n = ? AND canonical = ?", key).fetchone() is not None
+
+    def get(self, n):
+        """Return one stored solution for board size n, or None."""
+        found = self.solutions(n, limit=1)
+        return found[0] if found else None
+
+    def count(self, n=None):
+        """Number of stored symmetry classes, for one board size or in total."""
+        if n is None:
+            return self.connection.execute("SELECT COUNT(*) FROM solutions").fetchone()[0]
+        return self.connection.execute("SELECT COUNT(*) FROM solutions WHERE n = ?", (n,)).fetchone()[0]
+
+    def sizes(self):
+        """Board sizes that have stored solutions."""
+        return [n for (n,) in self.connection.execute("SELECT DISTINCT n FROM solutions ORDER BY n")]
@@ -0,0 +1,68 @@
+"""Board symmetries of N-Queens solutions.
+
+A solution is a permutation where ``solution[col]`` is the row of the queen
+in column ``col``. The 8 symmetries of the square map solutions to solutions;
+they are generated by reversing the columns, reversing the rows and
+transposing the board (taking the inverse permutation). Each transform is
+O(n), so canonicalising a solution is O(n).
+"""
+from Validity_check import is_valid_solution
+
+
+def _inverse(solution):
+    inverse = [0] * len(solution)
+    for col, row in enumerate(solution):
+        inverse[row] = col
+    return inverse
+
+
+def symmetries(solution):
+    """Return the 8 symmetric variants of a solution as tuples (some may coincide)."""
+    last = len(solution) - 1
+    variants = []
+    for board in (list(solution), _inverse(solution)):
+        flipped = [last - row for row in board]
+        variants.extend((tuple(board), tuple(board[::-1]), tuple(flipped), tuple(flipped[::-1])))
+    return variants
+
+
+def canonical_form(solution):
+    """Return the lexicographically smallest symmetric variant of a solution."""
+    return min(symmetries([int(row) for row in solution]))
+
+
+class DistinctSolutions:
+    """Streaming set of solutions, deduplicated by symmetry class.
+
+    ``add()`` canonicalises each solution in O(n) and keeps the first solution
+    seen for each class, so multi-run loops can count distinct classes as
+    results arrive and stop once they have enough.
+    """
+
+    def __init__(self, solutions=()):
+        self.classes = {}
+        for solution in solutions:
+            self.add(solution)
+
+    def add(self, solution):
+        """Add a solution; return True if it starts a new class.
+
+        Boards that are not valid solutions are ignored and return False.
+        """
+        if solution is None or len(solution) == 0 or not is_valid_solution(solution, base=0):
+            return False
+        canonical = canonical_form(solution)
+        if canonical in self.classes:
+            return False
+        self.classes[canonical] = [int(row) for row in solution]
+        return True
+
+    def __contains__(self, solution):
+        return canonical_form(solution) in self.classes
+
+    def __len__(self):
+        return len(self.classes)
+
+    def __iter__(self):
+        """Iterate over one representative solution per class, in the order they were found."""
+        return iter(self.classes.values())
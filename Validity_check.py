@@ -1,43 +1,158 @@
-def is_valid_solution(position):
-    """Check if the given solution is valid for the N-Queens problem."""
-    n = len(position)
+import json
+import sys
 
-    # Check for row threats
-    if len(set(position)) != n:
-        return False
+import numpy as np
 
-    # Check for diagonal threats
-    for i in range(n):
-        for j in range(i+1, n):
-            if abs(position[i] - position[j]) == abs(i - j):  # Main diagonal threat
-                return False
-            if position[i] + i == position[j] + j:  # Counter diagonal threat
-                return False
+from Conflict_count import line_counts_batch
+from nQueen_Backtrack import solution_set
 
-    return True
+# Candidates validated together by validate_stream()
+STREAM_BATCH_SIZE = 4096
+
+# Largest part of a board drawn by display_solution(), in squares per side
+DISPLAY_WINDOW = 32
+
+
+def is_valid_solution(position, base=None):
+    """Check if the given solution is valid for the N-Queens problem.
 
-def display_solution(position):
-    """Display the chessboard with queens."""
+    ``position[col]`` is the row of the queen in column ``col``, counted from
+    ``base`` (1 for the scripts' output, 0 for the solvers' boards). With the
+    default ``base=None`` rows are counted from the smallest one, so boards
+    with any offset are accepted. An empty board is not a solution. Runs in
+    O(n) and stops at the first attacked queen.
+    """
+    if position is None or len(position) == 0:
+        return False
+    if isinstance(position, np.ndarray):
+        position = position.tolist()
     n = len(position)
-    board = []
+    if base is None:
+        base = min(position)
+    rows, diagonals, anti_diagonals = set(), set(), set()
+    for col, row in enumerate(position):
+        row -= base
+        if not 0 <= row < n or row in rows or row - col in diagonals or row + col in anti_diagonals:
+            return False
+        rows.add(row)
+        diagonals.add(row - col)
+        anti_diagonals.add(row + col)
+    return True
+
+def valid_solutions(boards, base=None):
+    """Vectorised is_valid_solution() over a 2-D batch with one candidate per row.
+
+    Rows, diagonals and anti-diagonals are counted with one bincount each over
+    the whole batch, so every candidate is checked in O(n). Returns a boolean
+    array with one entry per candidate.
+    """
+    boards = np.asarray(boards, dtype=np.int64)
+    if boards.ndim != 2:
+        raise ValueError("Expected a 2-D batch of boards, one per row.")
+    num_boards, n = boards.shape
+    if n == 0:
+        return np.zeros(num_boards, dtype=bool)
+    rows = boards - (boards.min(axis=1, keepdims=True) if base is None else base)
+    cols = np.arange(n)
+    valid = ((rows >= 0) & (rows < n)).all(axis=1)
+    # Candidates with rows off the board are already rejected; count them as a diagonal-free placeholder instead
+    rows[~valid] = cols
+    for line in (rows, rows - cols + n - 1, rows + cols):
+        valid &= (line_counts_batch(line, 2 * n) <= 1).all(axis=1)
+    return valid
+
+def read_solutions(source):
+    """Yield candidates, one list of ints per non-blank line, from a path or an open text stream.
 
-    # Create the board with queens
-    for x in position:
-        row = ['   ' for _ in range(n)]
-        row[x-1] = ' Q '  # Subtract 1 from x here
-        board.append(row)
+    Rows may be separated by spaces or commas and wrapped in brackets, so both
+    printed solutions and JSON arrays are accepted, as are the JSON-lines records
+    written by Solution_output (their 1-based "solution" field is read). Lines
+    starting with # are skipped.
+    """
+    if isinstance(source, str):
+        with open(source) as stream:
+            yield from read_solutions(stream)
+        return
+    for line in source:
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        if line.startswith('{'):
+            yield [int(row) for row in json.loads(line)["solution"]]
+            continue
+        yield [int(token) for token in line.translate(str.maketrans('[],', '   ')).split()]
 
-    # Print the board with horizontal and vertical lines
-    h_line = '─' * (4 * n + 1)
-    for row in board:
+def validate_stream(source, base=1, batch_size=STREAM_BATCH_SIZE):
+    """Yield (candidate, valid) for each candidate read from a path or stream.
+
+    Consecutive candidates of the same size are checked together with
+    valid_solutions(), so large files are verified batch by batch in bounded memory.
+    """
+    batch = []
+
+    def flush():
+        if not batch:
+            return []
+        checked = list(zip(batch, valid_solutions(batch, base).tolist()))
+        batch.clear()
+        return checked
+
+    for candidate in read_solutions(source):
+        if batch and (len(candidate) != len(batch[0]) or len(batch) >= batch_size):
+            yield from flush()
+        batch.append(candidate)
+    yield from flush()
+
+def is_known_solution(position):
+    """Check a 1-based solution against the exact solution set from the backtracking solver.
+
+    Enumerating the set is only practical for small boards (n up to about 12),
+    which is where it serves as ground truth for is_valid_solution().
+    """
+    return tuple(x - 1 for x in position) in solution_set(len(position))
+
+def display_solution(position, window=DISPLAY_WINDOW, top=0, left=0):
+    """Display the chessboard with queens.
+
+    Boards larger than ``window`` squares per side are cropped to the window
+    whose first line is ``top`` and first square is ``left`` (both 0-based), so
+    only the visible part is ever built. Pass ``window=None`` to draw the whole board.
+    """
+    n = len(position)
+    if window is None:
+        window = n
+    top = max(0, min(top, n - 1))
+    left = max(0, min(left, n - 1))
+    bottom = min(n, top + window)
+    right = min(n, left + window)
+    if (top, left, bottom, right) != (0, 0, n, n):
+        print(f"Showing lines {top + 1}-{bottom} and squares {left + 1}-{right} of a {n}x{n} board")
+
+    # Print the visible part of the board with horizontal and vertical lines
+    h_line = '─' * (4 * (right - left) + 1)
+    for x in position[top:bottom]:
+        row = ['   '] * (right - left)
+        if left < x <= right:
+            row[x - 1 - left] = ' Q '  # Subtract 1 from x here
         print(h_line)
         print('|' + '|'.join(row) + '|')
     print(h_line)
 
 
-# Test the function
-solution =[4, 6, 8, 2, 7, 1, 3, 5]
+if __name__ == "__main__":
+    # Validate candidate files given on the command line ("-" reads standard input)
+    if len(sys.argv) > 1:
+        valid = total = 0
+        for path in sys.argv[1:]:
+            for candidate, ok in validate_stream(sys.stdin if path == '-' else path):
+                total += 1
+                valid += ok
+        print(f"{valid} of {total} candidates are valid solutions.")
+        sys.exit(0 if valid == total else 1)
+
+    # Test the function
+    solution = [4, 6, 8, 2, 7, 1, 3, 5]
 
-print("Solution is valid:", is_valid_solution(solution))
-print("\nChessboard:")
-display_solution(solution)
\ No newline at end of file
+    print("Solution is valid:", is_valid_solution(solution))
+    print("\nChessboard:")
+    display_solution(solution)
@@ -5,92 +5,139 @@ Created on Sun Nov 5 22:19:04 2023
 
 @author: MirzaTamzid
 """
-import random
-from itertools import accumulate
 import time
 
+import numpy as np
+
+from Budget import UNLIMITED
+from Conflict_count import attacking_pairs, attacking_pairs_batch, max_pairs, non_attacking_pairs
+from Instrumentation import resolve
+from Multi_run import run_many
+from Solution_output import SolutionWriter
+from Solution_store import warm_start_boards
+from Symmetry import DistinctSolutions
+
+# Define parameter sets for the ACO with different levels of intensity and search space.
+ACO_PARAMETER_SETS = {
+    1: {"num_ants": 20, "evaporation_rate": 0.1, "alpha": 1.0, "beta": 2.0, "iterations": 200},
+    2: {"num_ants": 50, "evaporation_rate": 0.1, "alpha": 1.0, "beta": 3.0, "iterations": 300},
+    3: {"num_ants": 100, "evaporation_rate": 0.05, "alpha": 1.0, "beta": 4.0, "iterations": 500}
+}
+
+# 'all' lets every ant deposit, 'elitist' only the iteration-best ant, and
+# 'max-min' deposits like 'elitist' but clamps the trails between tau_min and tau_max
+PHEROMONE_MODES = ('all', 'elitist', 'max-min')
+
 class ACO:
-    def __init__(self, n, num_ants, evaporation_rate, alpha, beta, iterations):
+    def __init__(self, n, num_ants, evaporation_rate, alpha, beta, iterations, pheromone_mode='all', warm_start=None, scorer=None):
+        if pheromone_mode not in PHEROMONE_MODES:
+            raise ValueError(f"pheromone_mode must be one of {PHEROMONE_MODES}, got {pheromone_mode!r}")
         self.n = n
         self.num_ants = num_ants
         self.evaporation_rate = evaporation_rate
         self.alpha = alpha
         self.beta = beta
         self.iterations = iterations
-        self.pheromone = [[1 for _ in range(n)] for _ in range(n)]
-
-    def run(self):
+        self.pheromone_mode = pheromone_mode
+        # With a scorer the ants build their placements directly in its boards
+        self.scorer = scorer
+        self.pheromone = np.ones((n, n))
+        # Warm-start boards lay an initial trail, deposited as if an ant had built them
+        for board in warm_start_boards(warm_start, num_ants):
+            self.pheromone[np.arange(n), board] += 1 / (1 + attacking_pairs(board))
+
+    def run(self, instrumentation=None, budget=None):
+        instrumentation = resolve(instrumentation)
+        budget = budget or UNLIMITED
+        instrumentation.start("aco", n=self.n, pheromone_mode=self.pheromone_mode)
         best_solution = None
         best_fitness = float('-inf')
+        target_fitness = max_pairs(self.n)
 
         for _ in range(self.iterations):
-            solutions = self.construct_solutions()
-            self.update_pheromone(solutions)
-
-            for solution in solutions:
-                fitness = self.fitness(solution)
-                if fitness > best_fitness:
-                    best_fitness = fitness
-                    best_solution = solution
-
+            with instrumentation.phase("construction"):
+                solutions = self.construct_solutions()
+            # Score every ant once; the deposit and the best tracking share the scores
+            with instrumentation.phase("fitness"):
+                fitnesses = self.score(solutions)
+            with instrumentation.phase("pheromone"):
+                self.update_pheromone(solutions, fitnesses)
+
+            best = int(np.argmax(fitnesses))
+            if fitnesses[best] > best_fitness:
+                best_fitness = fitnesses[best]
+                best_solution = solutions[best].tolist()
+            instrumentation.iteration(int(target_fitness - best_fitness))
+            if best_fitness == target_fitness or budget.exhausted(int(target_fitness - best_fitness)):
+                break  # Stop once a solution has been found or the budget is spent
+
+        instrumentation.finish(best_cost=int(target_fitness - best_fitness) if best_solution is not None else None)
         return best_solution
 
     def construct_solutions(self):
-        solutions = []
-        for _ in range(self.num_ants):
-            solution = []
-            for _ in range(self.n):
-                next_queen = self.select_next_queen(solution)
-                solution.append(next_queen)
-            solutions.append(solution)
+        """Build one solution per ant, placing column by column for all ants at once.
+
+        Each ant keeps counters of the rows, diagonals and anti-diagonals it has
+        already used, so the conflicts of every candidate row are read in O(1).
+        """
+        n = self.n
+        ants = np.arange(self.num_ants)
+        candidate_rows = np.arange(n)
+        scorer = self.scorer
+        if scorer is not None and scorer.boards.dtype == np.int64 and self.num_ants <= len(scorer.boards):
+            solutions = scorer.boards[:self.num_ants]
+        else:
+            solutions = np.empty((self.num_ants, n), dtype=np.int64)
+        rows = np.zeros((self.num_ants, n), dtype=np.int64)
+        diagonals = np.zeros((self.num_ants, 2 * n - 1), dtype=np.int64)
+        anti_diagonals = np.zeros((self.num_ants, 2 * n - 1), dtype=np.int64)
+        desirability = self.pheromone ** self.alpha
+
+        for col in range(n):
+            conflicts = rows + diagonals[:, candidate_rows - col + n - 1] + anti_diagonals[:, candidate_rows + col]
+            weights = desirability[col] * (1 / (1 + conflicts)) ** self.beta
+            chosen = self.roulette_wheel_selection(weights)
+            solutions[:, col] = chosen
+            rows[ants, chosen] += 1
+            diagonals[ants, chosen - col + n - 1] += 1
+            anti_diagonals[ants, chosen + col] += 1
         return solutions
 
-    def select_next_queen(self, solution):
-        probabilities = self.calculate_probabilities(solution)
-        return self.roulette_wheel_selection(probabilities)
-
-    def calculate_probabilities(self, solution):
-        pheromone = [self.pheromone[len(solution)][i] for i in range(self.n)]
-        heuristic = [1 / (1 + self.conflicts(solution, i)) for i in range(self.n)]
-        total = sum(p ** self.alpha * h ** self.beta for p, h in zip(pheromone, heuristic))
-
-        probabilities = [(pheromone[i] ** self.alpha * heuristic[i] ** self.beta) / total for i in range(self.n)]
-        return probabilities
-
-    def conflicts(self, solution, position):
-        conflicts = 0
-        for i, q in enumerate(solution):
-            if q == position or abs(len(solution) - i) == abs(q - position):
-                conflicts += 1
-        return conflicts
-
-    def roulette_wheel_selection(self, probabilities):
-        cumulative_prob = list(accumulate(probabilities))
-        r = random.random()
-        for i, prob in enumerate(cumulative_prob):
-            if r <= prob:
-                return i
-        return len(probabilities) - 1
-
-    def update_pheromone(self, solutions):
-        for i in range(self.n):
-            for j in range(self.n):
-                self.pheromone[i][j] *= (1 - self.evaporation_rate)
-
-        for solution in solutions:
-            fitness = self.fitness(solution)
-            for i, q in enumerate(solution):
-                if i < self.n and q < self.n:
-                    self.pheromone[i][q] += 1 / (fitness + 1e-5)
+    def roulette_wheel_selection(self, weights):
+        """Pick one index per row of weights with probability proportional to its weight."""
+        cumulative = np.cumsum(weights, axis=1)
+        r = np.random.random((len(weights), 1)) * cumulative[:, -1:]
+        return np.minimum((cumulative < r).sum(axis=1), weights.shape[1] - 1)
+
+    def update_pheromone(self, solutions, fitnesses):
+        self.pheromone *= (1 - self.evaporation_rate)
+
+        # Fewer attacking pairs leave a stronger trail
+        deposits = 1 / (1 + max_pairs(self.n) - fitnesses)
+        cols = np.arange(self.n)
+        if self.pheromone_mode == 'all':
+            np.add.at(self.pheromone, (np.tile(cols, len(solutions)), solutions.ravel()), np.repeat(deposits, self.n))
+            return
+
+        best = int(np.argmax(fitnesses))
+        self.pheromone[cols, solutions[best]] += deposits[best]
+        if self.pheromone_mode == 'max-min':
+            tau_max = deposits[best] / self.evaporation_rate
+            np.clip(self.pheromone, tau_max / (2 * self.n), tau_max, out=self.pheromone)
+
+    def score(self, solutions):
+        """Return the fitness of every row of a 2-D array of solutions."""
+        count_pairs = attacking_pairs_batch if self.scorer is None else self.scorer.attacking_pairs_batch
+        return max_pairs(self.n) - count_pairs(solutions)
 
     def fitness(self, solution):
-        total_conflicts = sum(self.conflicts(solution, solution[i]) for i in range(len(solution)))
-        non_attacking_pairs = (self.n * (self.n - 1) // 2) - total_conflicts
-        return non_attacking_pairs
+        return non_attacking_pairs(solution)
+
+def run_aco(n, num_ants, evaporation_rate, alpha, beta, iterations, pheromone_mode='all'):
+    return ACO(n, num_ants, evaporation_rate, alpha, beta, iterations, pheromone_mode).run()
 
 def main():
     n = int(input("Enter the board size (n): "))
-    _ = input("Enter the initial positions of the queens: ")
     num_ants = int(input("Enter the number of ants: "))
     evaporation_rate = float(input("Enter the pheromone evaporation rate: "))
     alpha = float(input("Enter alpha (influence of pheromone): "))
@@ -103,18 +150,23 @@ def main():
 
     start_time = time.time()  # Start the timer
 
-    for _ in range(runs):
-        aco = ACO(n, num_ants, evaporation_rate, alpha, beta, iterations)
-        solution = aco.run()
-        fitness = aco.fitness(solution)
-        if fitness > best_fitness_over_runs:
-            best_fitness_over_runs = fitness
-            best_solution_over_runs = solution
+    # Each new distinct solution is printed as a JSON line as soon as its run finishes;
+    # the best board is only kept in case no run solves the problem
+    solutions = DistinctSolutions()
+    with SolutionWriter(format="jsonl") as writer:
+        for _, solution in run_many(run_aco, runs, args=(n, num_ants, evaporation_rate, alpha, beta, iterations),
+                                    distinct=solutions, writer=writer):
+            fitness = non_attacking_pairs(solution)
+            if fitness > best_fitness_over_runs:
+                best_fitness_over_runs = fitness
+                best_solution_over_runs = solution
 
     end_time = time.time()  # End the timer
 
-    if best_solution_over_runs is not None:
-        print("Best solution found:", [pos + 1 for pos in best_solution_over_runs])  # Adjusting back to 1-indexed for output
+    if solutions:
+        print(f"Distinct solutions found (up to symmetry): {len(solutions)}")
+    elif best_solution_over_runs is not None:
+        print("No solution found. Best board found:", [pos + 1 for pos in best_solution_over_runs])  # 1-indexed for output
     else:
         print("No solution found.")
 
@@ -2,6 +2,14 @@
 import random
 import time
 
+from Budget import UNLIMITED
+from Conflict_count import Board, attacking_pairs
+from Instrumentation import resolve
+from Multi_run import run_many
+from Solution_output import SolutionWriter
+from Solution_store import warm_start_boards
+from Symmetry import DistinctSolutions
+
 # Define parameter sets for the Bee Algorithm with different levels of intensity and search space.
 BEE_ALGORITHM_PARAMETER_SETS = {
     # Parameter set 1 for smaller boards or quicker runs
@@ -14,13 +22,7 @@ BEE_ALGORITHM_PARAMETER_SETS = {
 
 # Function to calculate the cost (number of attacking pairs of queens)
 def cost(positions):
-    n = len(positions)
-    attack = 0
-    for i in range(n):
-        for j in range(i + 1, n):
-            if positions[i] == positions[j] or abs(positions[i] - positions[j]) == j - i:
-                attack += 1
-    return attack
+    return attacking_pairs(positions)
 
 # Function to generate a semi-random initial position based on a heuristic
 def heuristic_initial_positions(n):
@@ -47,118 +49,103 @@ def get_user_input(n):
         print("Invalid choice. Please enter 'input' or 'random'.")
         return get_user_input(n)
 
-# Function to perform local search to improve a given solution
-def local_search(solution, n, ngh):
-    for col in range(n):
-        min_conflicts = n
-        best_row = solution[col]
-        # Explore the neighborhood of the current position within the range defined by ngh
-        for row in range(max(0, col - ngh), min(n, col + ngh + 1)):
-            if row != solution[col]:
-                solution[col] = row
-                conflicts = cost(solution)
-                if conflicts < min_conflicts:
-                    min_conflicts = conflicts
-                    best_row = row
-        solution[col] = best_row
-        if min_conflicts == 0:
-            break  # Stop if we find a position with no conflicts
-    return solution
-
-
-# Function to abandon sites that have not improved past a certain threshold
-def site_abandonment(solutions, costs, threshold):
-     return [(solution, cost) for solution, cost in zip(solutions, costs) if cost <= threshold]
+# Function to send recruited bees to the patch around a site. Each bee picks an attacked queen and samples
+# one random move within ngh rows of its current row, scored in O(1) from the site's counters without
+# changing it. The site takes the best move and, if it improved, a new wave of bees is sent; a wave that
+# finds no improvement means the patch has stalled, and its best sideways move (if any) is kept so the
+# next visit starts elsewhere on the plateau. Returns True if the site improved.
+def forage(board, num_bees, ngh):
+    n = board.n
+    improved = False
+    while board.cost:
+        attacked = [col for col in range(n) if board.conflicts(col)]
+        best_delta, best_move = 1, None
+        for _ in range(num_bees):
+            col = random.choice(attacked)
+            row = board.positions[col]
+            new_row = random.randint(max(0, row - ngh), min(n - 1, row + ngh))
+            if new_row == row:
+                continue
+            delta = board.move_delta(col, new_row)
+            if delta < best_delta:
+                best_delta, best_move = delta, (col, new_row)
+        if best_move is not None:
+            board.move(*best_move)
+        if best_delta >= 0:
+            break  # The patch has stalled
+        improved = True
+    return improved
+
+# Factor applied to a patch's neighbourhood size each time the patch stalls, down to a floor of
+# MIN_NGH_FRACTION of the board: a queen can only escape a local minimum if it may move a fair distance.
+# The floor never exceeds the configured ngh, so shrinking never widens a patch.
+SHRINK_FACTOR = 0.8
+MIN_NGH_FRACTION = 0.25
+
+# A flower patch: the site's board, its own neighbourhood size and how many iterations it has stalled
+class Site:
+    __slots__ = ("board", "ngh", "stalled")
+
+    def __init__(self, positions, ngh):
+        self.board = Board(positions)
+        self.ngh = ngh
+        self.stalled = 0
 
 # Function to perform a global search to escape local optima
 def global_search(num_scouts, n):
     return [heuristic_initial_positions(n) for _ in range(num_scouts)]
 
-# Main function implementing the Bees Algorithm for solving the N-Queens problem
-def bees_algorithm(n, num_scouts, num_best_sites, num_bees_best_sites, num_other_sites, num_bees_other_sites, max_iterations, ngh, stlim):
+# Main function implementing the Bees Algorithm for solving the N-Queens problem.
+# Each iteration the best num_best_sites and the next num_other_sites patches are searched by recruited
+# bees and the remaining scouts are sent to new random sites. A patch that does not improve has its
+# neighbourhood shrunk (and restored when it improves again), and after stlim such iterations in a row
+# it is abandoned for a new random site.
+def bees_algorithm(n, num_scouts, num_best_sites, num_bees_best_sites, num_other_sites, num_bees_other_sites, max_iterations, ngh, stlim, instrumentation=None, budget=None, warm_start=None):
+    instrumentation = resolve(instrumentation)
+    budget = budget or UNLIMITED
+    instrumentation.start("bees", n=n)
     # Initialize scout solutions
     scout_solutions = [heuristic_initial_positions(n) for _ in range(num_scouts)]
+    for i, board in enumerate(warm_start_boards(warm_start, num_scouts)):
+        scout_solutions[i] = board
+    with instrumentation.phase("evaluation"):
+        sites = [Site(solution, ngh) for solution in scout_solutions]
+    num_selected = min(num_scouts, num_best_sites + num_other_sites)
+    min_ngh = min(ngh, max(1, int(n * MIN_NGH_FRACTION)))
     best_solution = None
     best_cost = float('inf')
-    some_interval = 10  # Interval for neighborhood shrinking
-    some_threshold = 2  # Threshold for site abandonment
-    no_improvement_runs = 0
-    max_no_improvement_runs = stlim  # Maximum runs without improvement before stopping
 
     for iteration in range(max_iterations):
-        # Evaluate all scout solutions
-        costs = [cost(solution) for solution in scout_solutions]
-        sorted_solutions = sorted(zip(scout_solutions, costs), key=lambda x: x[1])
-
-        # Select best sites and perform local search
-        best_sites = sorted_solutions[:num_best_sites]
-        for i, (solution, solution_cost) in enumerate(best_sites):
-            for _ in range(num_bees_best_sites):
-                improved_solution = local_search(solution, n, ngh)
-                improved_cost = cost(improved_solution)
-                if improved_cost < solution_cost:
-                    best_sites[i] = (improved_solution, improved_cost)
-                    solution_cost = improved_cost
-
-        # Select other sites and perform local search
-        other_sites = sorted_solutions[num_best_sites:num_best_sites+num_other_sites]
-        for i, (solution, solution_cost) in enumerate(other_sites):
-            for _ in range(num_bees_other_sites):
-                improved_solution = local_search(solution, n, ngh)
-                improved_cost = cost(improved_solution)
-                if improved_cost < solution_cost:
-                    other_sites[i] = (improved_solution, improved_cost)
-                    solution_cost = improved_cost
-
-        # Combine best and other sites after local search
-        combined_sites = best_sites + other_sites
-        combined_solutions = [site for site, _ in combined_sites]
-        combined_costs = [cost for _, cost in combined_sites]
-
-        # Abandon sites that have not improved past the threshold
-        combined_sites = site_abandonment(combined_solutions, combined_costs, some_threshold)
-        # Check for early termination if no improvement is observed
-        if combined_sites:
-            current_best_solution, current_best_cost = min(combined_sites, key=lambda x: x[1])
-            if current_best_cost < best_cost:
-                best_solution, best_cost = current_best_solution, current_best_cost
-                no_improvement_runs = 0
-            else:
-                no_improvement_runs += 1
-                if no_improvement_runs >= max_no_improvement_runs:
-                    break
-        else:
-            # If all sites are abandoned, regenerate the scout solutions
-            scout_solutions = global_search(num_scouts, n)
-            continue
-
-        # Perform neighborhood shrinking at certain intervals
-        if iteration % some_interval == 0 and iteration > 0:
-            for i in range(len(scout_solutions)):
-                scout_solutions[i] = local_search(scout_solutions[i], n, ngh)
-
-        # Replace abandoned sites with new random scouts
-        while len(combined_sites) < num_best_sites + num_other_sites:
-            new_scout = heuristic_initial_positions(n)
-            new_cost = cost(new_scout)
-            combined_sites.append((new_scout, new_cost))
-
-        # Update scout solutions with the combined sites
-        scout_solutions = [solution for solution, cost in combined_sites]
+        # Rank the sites and keep the best board found so far
+        sites.sort(key=lambda site: site.board.cost)
+        if sites[0].board.cost < best_cost:
+            best_solution, best_cost = sites[0].board.positions[:], sites[0].board.cost
+        instrumentation.iteration(best_cost)
+        if best_cost == 0 or budget.exhausted(best_cost):
+            break
 
+        # Recruited bees search the selected patches; stalled patches shrink and are eventually abandoned
+        with instrumentation.phase("local_search"):
+            for rank, site in enumerate(sites[:num_selected]):
+                num_bees = num_bees_best_sites if rank < num_best_sites else num_bees_other_sites
+                if forage(site.board, num_bees, site.ngh):
+                    site.stalled = 0
+                    site.ngh = ngh
+                else:
+                    site.stalled += 1
+                    site.ngh = max(min_ngh, int(site.ngh * SHRINK_FACTOR))
+                if site.board.cost < best_cost:
+                    best_solution, best_cost = site.board.positions[:], site.board.cost
+                if site.stalled >= stlim:
+                    sites[rank] = Site(heuristic_initial_positions(n), ngh)
+
+        # The remaining scouts search globally for new sites
+        with instrumentation.phase("global_search"):
+            sites[num_selected:] = [Site(solution, ngh) for solution in global_search(num_scouts - num_selected, n)]
+
+    instrumentation.finish(best_cost=best_cost)
     return best_solution
 
-# Function to check if a solution is valid (no queens are attacking each other)
-def is_solution_valid(position):
-    n = len(position)
-    if len(set(position)) != n:
-        return False
-    for i in range(n):
-        for j in range(i + 1, n):
-            if abs(position[i] - position[j]) == abs(i - j):
-                return False
-    return True
-
 # Example usage of the algorithm
 if __name__ == "__main__":
     # Input board size with validation
@@ -215,25 +202,21 @@ if __name__ == "__main__":
         else:
             print("Invalid choice. Please enter 1, 2, 3, or 4.")
 
-    # Run the Bee Algorithm
-    solutions = []
+    # Run the Bee Algorithm; each new distinct solution is printed as a JSON line as soon as it is found
+    solutions = DistinctSolutions()
     start_time = time.time()  # Start timing
     print("Running the Bee Algorithm...")
-    for run in range(num_runs):
-        print(f"Run {run + 1}/{num_runs}")
-        best_solution = bees_algorithm(n, **params)
-        if best_solution and is_solution_valid(best_solution):
-            solutions.append(best_solution)
+    with SolutionWriter(format="jsonl") as writer:
+        for finished, (run, best_solution) in enumerate(
+                run_many(bees_algorithm, num_runs, args=(n,), kwargs=params, distinct=solutions, writer=writer), start=1):
+            print(f"Run {finished}/{num_runs} finished")
 
     end_time = time.time()  # End timing
     time_spent = end_time - start_time  # Calculate time spent
 
     # Display results
     if solutions:
-        print("\nSolutions found:")
-        for i, solution in enumerate(solutions):
-            adjusted_solution = [pos + 1 for pos in solution]
-            print(f"Solution {i + 1} (positions): {adjusted_solution}")
+        print(f"\nDistinct solutions found (up to symmetry): {len(solutions)}")
         print(f"\nTime spent: {time_spent:.2f} seconds")
     else:
         print("\nNo valid solutions found.")
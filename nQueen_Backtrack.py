@@ -0,0 +1,230 @@
+"""Exact bitboard backtracking solver for the N-Queens problem.
+
+Rows, diagonals and anti-diagonals under attack are kept as bitmasks, so
+each placement step is a handful of integer operations. Solutions use the
+same encoding as the other solvers: ``solution[col]`` is the 0-based row of
+the queen in column ``col``.
+"""
+from functools import lru_cache
+
+from Budget import UNLIMITED
+
+# Largest board that first_solution() searches; larger boards use the explicit construction
+BACKTRACK_LIMIT = 20
+
+
+def _count(full, rows, diagonals, anti_diagonals):
+    """Count the completions of a partial placement."""
+    if rows == full:
+        return 1
+    count = 0
+    free = full & ~(rows | diagonals | anti_diagonals)
+    while free:
+        bit = free & -free
+        free ^= bit
+        count += _count(full, rows | bit, ((diagonals | bit) << 1) & full, (anti_diagonals | bit) >> 1)
+    return count
+
+
+def _count_classes(n):
+    """Count the solutions on an n x n board (n >= 4) by the size of their symmetry class.
+
+    Each class of solutions under the 8 rotations and reflections of the board
+    is searched once, from its representative with the smallest first-column
+    queen, and the board's rotations decide whether the class has 2, 4 or 8
+    members. Returns (classes of 2, classes of 4, classes of 8).
+    """
+    last = n - 1
+    full = (1 << n) - 1
+    top = 1 << last
+    board = [0] * n
+    counts = [0, 0, 0]
+    bound1 = bound2 = side_mask = last_mask = end_bit = 0
+
+    def corner(col, diagonals, rows, anti_diagonals):
+        # First queen in the corner: only the reflection in the main diagonal can map the board to itself
+        free = full & ~(diagonals | rows | anti_diagonals)
+        if col == last:
+            if free:
+                counts[2] += 1
+            return
+        if col < bound1:
+            free &= ~2
+        while free:
+            bit = free & -free
+            free ^= bit
+            corner(col + 1, ((diagonals | bit) << 1) & full, rows | bit, (anti_diagonals | bit) >> 1)
+
+    def check():
+        # Compare the board with its rotations by 90, 180 and 270 degrees; a smaller rotation means
+        # the class was already counted from that rotation
+        if board[bound2] == 1:
+            pattern, own = 2, 1
+            while own <= last:
+                bit, other = 1, last
+                while board[other] != pattern and board[own] >= bit:
+                    bit <<= 1
+                    other -= 1
+                if board[own] > bit:
+                    return
+                if board[own] < bit:
+                    break
+                own += 1
+                pattern <<= 1
+            if own > last:
+                counts[0] += 1
+                return
+        if board[last] == end_bit:
+            other, own = last - 1, 1
+            while own <= last:
+                bit, pattern = 1, top
+                while pattern != board[other] and board[own] >= bit:
+                    bit <<= 1
+                    pattern >>= 1
+                if board[own] > bit:
+                    return
+                if board[own] < bit:
+                    break
+                own += 1
+                other -= 1
+            if own > last:
+                counts[1] += 1
+                return
+        if board[bound1] == top:
+            pattern, own = top >> 1, 1
+            while own <= last:
+                bit, other = 1, 0
+                while board[other] != pattern and board[own] >= bit:
+                    bit <<= 1
+                    other += 1
+                if board[own] > bit:
+                    return
+                if board[own] < bit:
+                    break
+                own += 1
+                pattern >>= 1
+        counts[2] += 1
+
+    def edge(col, diagonals, rows, anti_diagonals):
+        # No queen in a corner: the queens on the edges are kept no closer to a corner than the first one
+        free = full & ~(diagonals | rows | anti_diagonals)
+        if col == last:
+            if free and not free & last_mask:
+                board[col] = free
+                check()
+            return
+        if col < bound1:
+            free &= ~side_mask
+        elif col == bound2:
+            if not rows & side_mask:
+                return
+            if rows & side_mask != side_mask:
+                free &= side_mask
+        while free:
+            bit = free & -free
+            free ^= bit
+            board[col] = bit
+            edge(col + 1, ((diagonals | bit) << 1) & full, rows | bit, (anti_diagonals | bit) >> 1)
+
+    board[0] = 1
+    for bound1 in range(2, last):
+        board[1] = bit = 1 << bound1
+        corner(2, (2 | bit) << 1, 1 | bit, bit >> 1)
+
+    side_mask = last_mask = top | 1
+    end_bit = top >> 1
+    bound1, bound2 = 1, n - 2
+    while bound1 < bound2:
+        board[0] = bit = 1 << bound1
+        edge(1, bit << 1, bit, bit >> 1)
+        last_mask |= last_mask >> 1 | last_mask << 1
+        end_bit >>= 1
+        bound1 += 1
+        bound2 -= 1
+    return tuple(counts)
+
+
+def count_solutions(n, symmetry=True):
+    """Return the number of solutions on an n x n board.
+
+    With ``symmetry`` each class of solutions under the 8 rotations and
+    reflections of the board is searched once and counted by its size, which
+    visits about a quarter of the nodes of the plain search. The count is still
+    exponential in n: it takes a few seconds for n = 14 and grows roughly
+    sixfold per extra row, so n = 15 is the practical limit.
+    """
+    if n < 1:
+        return 0
+    if not symmetry:
+        return _count((1 << n) - 1, 0, 0, 0)
+    if n < 4:
+        return 1 if n == 1 else 0
+    classes_of_2, classes_of_4, classes_of_8 = _count_classes(n)
+    return 2 * classes_of_2 + 4 * classes_of_4 + 8 * classes_of_8
+
+
+def enumerate_solutions(n, symmetry=False, budget=None):
+    """Yield every solution on an n x n board as a list of rows.
+
+    With ``symmetry`` only solutions whose first queen lies in the upper half
+    (or the middle row for odd n) are yielded; reflecting them top to bottom
+    gives the rest. The search ends early once ``budget`` is spent.
+    Generating every solution is practical up to n ~ 12; beyond that, use
+    count_solutions() for the total or first_solution() for a single board.
+    """
+    if n < 1:
+        return
+    budget = budget or UNLIMITED
+    full = (1 << n) - 1
+    first_rows = range((n + 1) // 2) if symmetry else range(n)
+    solution = [0] * n
+
+    def place(col, rows, diagonals, anti_diagonals):
+        if col == n:
+            yield list(solution)
+            return
+        if budget.exhausted():
+            return
+        free = full & ~(rows | diagonals | anti_diagonals)
+        while free:
+            bit = free & -free
+            free ^= bit
+            solution[col] = bit.bit_length() - 1
+            yield from place(col + 1, rows | bit, ((diagonals | bit) << 1) & full, (anti_diagonals | bit) >> 1)
+
+    for row in first_rows:
+        bit = 1 << row
+        solution[0] = row
+        yield from place(1, bit, (bit << 1) & full, bit >> 1)
+
+
+def explicit_solution(n):
+    """Return a solution for n >= 4 built directly in O(n), without search."""
+    evens = list(range(2, n + 1, 2))
+    odds = list(range(1, n + 1, 2))
+    if n % 6 == 2:
+        odds = [3, 1] + odds[3:] + [5]
+    elif n % 6 == 3:
+        evens = evens[1:] + [2]
+        odds = odds[2:] + [1, 3]
+    return [row - 1 for row in evens + odds]
+
+
+def first_solution(n, budget=None):
+    """Return the first solution found on an n x n board, or None if there is none or the budget ran out."""
+    if n in (2, 3) or n < 1:
+        return None
+    if n > BACKTRACK_LIMIT:
+        return explicit_solution(n)
+    return next(enumerate_solutions(n, budget=budget), None)
+
+
+@lru_cache(maxsize=None)
+def solution_set(n):
+    """Return the set of all solutions on an n x n board as tuples; practical up to n ~ 12."""
+    return frozenset(tuple(solution) for solution in enumerate_solutions(n))
+
+
+def backtracking(n, budget=None):
+    """Solver entry point matching the other solvers: return one solution or None."""
+    return first_solution(n, budget)
@@ -2,6 +2,15 @@
 import numpy as np
 import random
 import time
+from multiprocessing import Pipe, Process, cpu_count, current_process
+
+from Budget import UNLIMITED
+from Conflict_count import Board, DiagonalCounter, attacking_pairs_batch, max_pairs, non_attacking_pairs
+from Instrumentation import NULL_INSTRUMENTATION, resolve
+from Multi_run import run_many, run_seeds
+from Solution_output import SolutionWriter
+from Solution_store import warm_start_boards
+from Validity_check import is_valid_solution
 
 # Define parameter sets for the Genetic Algorithm with different levels of intensity and search space.
 GA_PARAMETER_SETS = {
@@ -12,15 +21,7 @@ GA_PARAMETER_SETS = {
 
 # Function to calculate the fitness (number of non-attacking pairs of queens)
 def fitness(chromosome):
-    n = len(chromosome)
-    max_fitness = (n*(n-1)) // 2
-    horizontal_collisions = sum([chromosome.count(queen)-1 for queen in chromosome]) / 2
-    diagonal_collisions = 0
-    for i in range(n):
-        for j in range(i + 1, n):
-            if abs(chromosome[i] - chromosome[j]) == j - i:
-                diagonal_collisions += 1
-    return max_fitness - (horizontal_collisions + diagonal_collisions)
+    return non_attacking_pairs(chromosome)
 
 # Function to create a random chromosome or use the user-provided initial state
 def create_initial_state(n, user_input=None):
@@ -51,15 +52,6 @@ def mutate(chromosome, mutation_rate):
             chromosome[i], chromosome[j] = chromosome[j], chromosome[i]
     return chromosome
 
-# Function to check if a solution is valid
-def is_solution_valid(chromosome):
-    n = len(chromosome)
-    for i in range(n):
-        for j in range(i + 1, n):
-            if abs(chromosome[i] - chromosome[j]) == j - i:
-                return False
-    return True
-
 # Function to perform local search on a chromosome using hill climbing
 def local_search(chromosome, iterations=10):
     current_fitness = fitness(chromosome)
@@ -69,61 +61,650 @@ def local_search(chromosome, iterations=10):
         if new_fitness > current_fitness:
             chromosome, current_fitness = new_chromosome, new_fitness
     return chromosome
-# Repair function using the minimum-conflicts heuristic
-def repair(chromosome):
-    max_attempts = len(chromosome) ** 2
+# Repair function using the minimum-conflicts heuristic, making at most max_attempts moves (n * n by default)
+# and stopping early once the budget is spent
+def repair(chromosome, budget=UNLIMITED, max_attempts=None):
+    board = Board(chromosome)
+    if max_attempts is None:
+        max_attempts = len(chromosome) ** 2
     for _ in range(max_attempts):
-        conflicts = find_conflicts(chromosome)
-        if not conflicts:
+        if board.cost == 0 or budget.exhausted():
             break
+        conflicts = find_conflicts(board)
         queen = random.choice(conflicts)
-        min_conflict_pos = find_min_conflict(chromosome, queen)
-        chromosome[queen] = min_conflict_pos
+        board.move(queen, find_min_conflict(board, queen))
+    chromosome[:] = board.positions
     return chromosome
 
 # Function to find queens with conflicts
-def find_conflicts(chromosome):
-    conflicts = []
-    for i in range(len(chromosome)):
-        for j in range(i + 1, len(chromosome)):
-            if chromosome[i] == chromosome[j] or abs(chromosome[i] - chromosome[j]) == j - i:
-                conflicts.append(i)
-                break
-    return conflicts
+def find_conflicts(board):
+    return [col for col in range(board.n) if board.conflicts(col)]
 
 # Function to find the position with the least conflicts for a queen
-def find_min_conflict(chromosome, queen):
-    positions = range(len(chromosome))
-    current_pos = chromosome[queen]
-    min_conflict = len(chromosome)
+def find_min_conflict(board, queen):
+    current_pos = board.positions[queen]
+    min_conflict = board.n
     min_conflict_pos = current_pos
-    for pos in positions:
+    for pos in range(board.n):
         if pos != current_pos:
-            chromosome[queen] = pos
-            conflicts = sum(1 for i in range(len(chromosome)) if i != queen and (chromosome[i] == pos or abs(chromosome[i] - pos) == abs(i - queen)))
+            conflicts = board.attacks_at(queen, pos)
             if conflicts < min_conflict:
                 min_conflict = conflicts
                 min_conflict_pos = pos
-    chromosome[queen] = current_pos  
     return min_conflict_pos
+# Batched fitness of a whole population stored as a (population_size, n) array, by the scorer if one is given
+def population_fitness(population, scorer=None):
+    count_pairs = attacking_pairs_batch if scorer is None else scorer.attacking_pairs_batch
+    return max_pairs(population.shape[1]) - count_pairs(population)
+
+# Batched roulette-wheel selection, returning the parents as consecutive pairs of rows
+def select_parents_batch(population, fitnesses):
+    weights = fitnesses.astype(float)
+    if weights.sum() <= 0:
+        weights = weights + 1
+    cumulative = np.cumsum(weights)
+    num_parents = population.shape[0] + population.shape[0] % 2
+    picks = np.searchsorted(cumulative, np.random.random(num_parents) * cumulative[-1], side='right')
+    return population[np.minimum(picks, population.shape[0] - 1)]
+
+# Batched one-point crossover applied to consecutive pairs of parents
+def crossover_batch(parents, crossover_rate):
+    parent1, parent2 = parents[0::2], parents[1::2]
+    num_pairs, n = parent1.shape
+    points = np.random.randint(1, max(n - 1, 2), size=num_pairs)
+    points[np.random.random(num_pairs) >= crossover_rate] = n  # No crossover for these pairs
+    head = np.arange(n) < points[:, None]
+    children = np.empty_like(parents)
+    children[0::2] = np.where(head, parent1, parent2)
+    children[1::2] = np.where(head, parent2, parent1)
+    return children
+
+# Batched mutation: the genes picked with probability mutation_rate are shuffled among themselves
+def mutate_batch(population, mutation_rate):
+    size, n = population.shape
+    mutated = np.random.random((size, n)) < mutation_rate
+    cols = np.arange(n)
+    # Sorting on (not mutated, key) lines up the picked genes first, in column order and in random order
+    base = np.where(mutated, 0, 2 * n)
+    targets = np.argsort(base + cols, axis=1, kind='stable')
+    sources = np.argsort(base + np.where(mutated, np.random.random((size, n)) * n, cols), axis=1, kind='stable')
+    result = np.empty_like(population)
+    np.put_along_axis(result, targets, np.take_along_axis(population, sources, axis=1), axis=1)
+    return result
+
+# Genetic Algorithm with the population held as one array, so a generation is a few NumPy kernels.
+# Only the generation's best chromosome is repaired; it is carried into the next generation.
+def batched_genetic_algorithm(n, population_size, max_generations, crossover_rate, mutation_rate, initial_state=None, runs=1, instrumentation=None, budget=None, warm_start=None, scorer=None):
+    instrumentation = resolve(instrumentation)
+    budget = budget or UNLIMITED
+    best_solution_overall = None
+    best_fitness_overall = -1
+    best_solution_any = None
+    best_fitness_any = -1
+    target_fitness = max_pairs(n)
+
+    for run in range(runs):
+        if run and budget.exhausted(target_fitness - best_fitness_any):
+            break
+        instrumentation.start("ga", n=n, batched=True, run=run)
+        if initial_state:
+            population = np.tile(np.array(initial_state) - 1, (population_size, 1))
+        else:
+            population = np.argsort(np.random.random((population_size, n)), axis=1)
+        for i, board in enumerate(warm_start_boards(warm_start, population_size)):
+            population[i] = board
+        best_solution = None
+        best_fitness = -1
+
+        for generation in range(max_generations):
+            with instrumentation.phase("fitness"):
+                fitnesses = population_fitness(population, scorer)
+            with instrumentation.phase("repair"):
+                best_index = int(np.argmax(fitnesses))
+                elite = np.array(repair(population[best_index].tolist(), budget))
+                population[best_index] = elite
+                fitnesses[best_index] = non_attacking_pairs(elite)
+
+            if fitnesses[best_index] > best_fitness:
+                best_fitness = int(fitnesses[best_index])
+                best_solution = elite.tolist()
+            instrumentation.iteration(target_fitness - best_fitness)
+            if best_fitness == target_fitness or budget.exhausted(target_fitness - best_fitness):
+                break  # Stop if a valid solution is found or the budget is spent
+
+            with instrumentation.phase("selection"):
+                parents = select_parents_batch(population, fitnesses)
+                population = mutate_batch(crossover_batch(parents, crossover_rate), mutation_rate)[:population_size]
+                population[0] = elite
+        instrumentation.finish(best_cost=target_fitness - best_fitness)
+
+        if best_fitness == target_fitness and best_fitness > best_fitness_overall:
+            best_solution_overall = best_solution
+            best_fitness_overall = best_fitness
+        if best_fitness > best_fitness_any:
+            best_solution_any = best_solution
+            best_fitness_any = best_fitness
+
+    if best_solution_overall is None and budget.anytime:
+        return best_solution_any
+    return best_solution_overall
+
+# Smallest integer type holding the rows of an n x n board, e.g. one byte per gene up to n = 256
+def gene_dtype(n):
+    return np.min_scalar_type(max(n - 1, 0))
+
+# The permutation operators below write their child into a preallocated row instead of returning a new one,
+# using the scratch arrays of a GenerationBuffers for their intermediate steps. Their indices are always in
+# range, so take() runs with mode='clip', which writes straight into out instead of through a buffer.
+
+# Order crossover (OX): a slice of parent1 is kept and the other genes follow in parent2's order
+def order_crossover(parent1, parent2, child, scratch):
+    n = len(parent1)
+    a, b = sorted(random.sample(range(n + 1), 2))
+    child[a:b] = parent1[a:b]
+    kept, missing = scratch.mask, scratch.spare_mask
+    kept[:] = False
+    kept[parent1[a:b]] = True
+    # parent2 read from b onwards, wrapping round; its genes not in the slice fill the child from b onwards
+    order = scratch.genes
+    order[:n - b] = parent2[b:]
+    order[n - b:] = parent2[:b]
+    kept.take(order, out=missing, mode='clip')
+    np.logical_not(missing, out=missing)
+    fill = scratch.mapped[:n - (b - a)]
+    order.compress(missing, out=fill)
+    child[b:] = fill[:n - b]
+    child[:a] = fill[n - b:]
+    return child
+
+# Partially mapped crossover (PMX): a slice of parent1, the rest from parent2 mapped through the slice
+def partially_mapped_crossover(parent1, parent2, child, scratch):
+    n = len(parent1)
+    a, b = sorted(random.sample(range(n + 1), 2))
+    in_slice = scratch.mask
+    in_slice[:] = False
+    in_slice[parent1[a:b]] = True
+    # A gene placed by the slice at some position maps to parent2's gene at that position
+    position1, mapping = scratch.position, scratch.mapping
+    position1[parent1] = scratch.columns
+    parent2.take(position1, out=mapping, mode='clip')
+    outside = n - (b - a)
+    genes, mapped, clash = scratch.genes[:outside], scratch.mapped[:outside], scratch.spare_mask[:outside]
+    genes[:a] = parent2[:a]
+    genes[a:] = parent2[b:]
+    # Genes already placed by the slice are replaced along the mapping until none are left
+    while True:
+        in_slice.take(genes, out=clash, mode='clip')
+        if not clash.any():
+            break
+        mapping.take(genes, out=mapped, mode='clip')
+        np.copyto(genes, mapped, where=clash)
+    child[a:b] = parent1[a:b]
+    child[:a] = genes[:a]
+    child[b:] = genes[a:]
+    return child
+
+# Cycle crossover (CX): alternate cycles of positions are taken from parent1 and parent2
+def cycle_crossover(parent1, parent2, child, scratch):
+    n = len(parent1)
+    columns, labels, step, spare = scratch.columns, scratch.labels, scratch.step, scratch.spare
+    position1 = scratch.position
+    position1[parent1] = columns
+    # Label every position with the first position of its cycle by pointer doubling
+    position1.take(parent2, out=step, mode='clip')
+    labels[:] = columns
+    for _ in range(max(n, 1).bit_length()):
+        labels.take(step, out=spare, mode='clip')
+        np.minimum(labels, spare, out=labels)
+        step.take(step, out=spare, mode='clip')
+        step, spare = spare, step
+    # Cycles are counted in order of their first position; the even-numbered ones come from parent2
+    from_parent2 = scratch.mask
+    np.equal(labels, columns, out=from_parent2)
+    np.add.accumulate(from_parent2, out=spare, dtype=np.intp)
+    spare.take(labels, out=step, mode='clip')
+    np.bitwise_and(step, 1, out=step)
+    np.equal(step, 0, out=from_parent2)
+    child[:] = parent1
+    np.copyto(child, parent2, where=from_parent2)
+    return child
+
+CROSSOVER_OPERATORS = {"ox": order_crossover, "pmx": partially_mapped_crossover, "cycle": cycle_crossover}
+
+# Swap mutation: with probability mutation_rate two random genes exchange places
+def swap_mutation(chromosome, mutation_rate):
+    if random.random() < mutation_rate:
+        i, j = random.randrange(len(chromosome)), random.randrange(len(chromosome))
+        chromosome[i], chromosome[j] = chromosome[j], chromosome[i]
+    return chromosome
+
+# Contenders per tournament
+TOURNAMENT_SIZE = 2
+
+# Tournament selection: each pick is the fittest of TOURNAMENT_SIZE random chromosomes, O(1) per pick
+def tournament_selection(fitnesses, out, scratch):
+    uniform, contenders, contender_fitnesses = scratch.uniform, scratch.contenders, scratch.contender_fitnesses
+    scratch.rng.random(out=uniform)
+    np.multiply(uniform, len(fitnesses), out=uniform)
+    np.copyto(contenders, uniform, casting='unsafe')  # Truncation picks uniformly from range(len(fitnesses))
+    fitnesses.take(contenders, out=contender_fitnesses, mode='clip')
+    contender_fitnesses.argmax(axis=1, out=scratch.winners)
+    # Index of each winner in the flattened contenders
+    np.multiply(scratch.picks, TOURNAMENT_SIZE, out=scratch.flat)
+    np.add(scratch.flat, scratch.winners, out=scratch.flat)
+    contenders.reshape(-1).take(scratch.flat, out=out, mode='clip')
+    return out
+
+# Stochastic universal sampling: one spin of a wheel with len(out) evenly spaced pointers
+def stochastic_universal_selection(fitnesses, out, scratch):
+    picks = len(out)
+    wheel = scratch.wheel
+    np.subtract(fitnesses, fitnesses.min() - 1, out=wheel)  # Selection pressure relative to the worst chromosome
+    np.add.accumulate(wheel, out=wheel)
+    spacing = wheel[-1] / picks
+    offset = scratch.rng.random() * spacing
+    # Chromosome i is picked once for each pointer offset + k * spacing in [wheel[i - 1], wheel[i]), so
+    # counting the pointers below every wheel edge and accumulating those counts gives the picks in order
+    np.subtract(wheel, offset, out=wheel)
+    np.divide(wheel, spacing, out=wheel)
+    np.ceil(wheel, out=wheel)
+    np.maximum(wheel, 0, out=wheel)
+    np.minimum(wheel, picks, out=wheel)
+    np.copyto(scratch.edges, wheel, casting='unsafe')
+    pointers_below = scratch.pointers_below
+    pointers_below[:] = 0
+    np.add.at(pointers_below, scratch.edges, 1)
+    np.add.accumulate(pointers_below[:picks], out=out)
+    scratch.rng.shuffle(out)  # Consecutive picks become mating pairs, so break up the sorted order
+    return out
+
+SELECTION_METHODS = {"tournament": tournament_selection, "sus": stochastic_universal_selection}
+
+# Repair of a permutation by swaps: each attacked queen trades rows with the column that removes the most attacks.
+# With shuffle the queens are visited in a new random order on every pass, so repeated repairs reach different boards.
+def swap_repair(chromosome, shuffle=False):
+    board = Board(chromosome)
+    columns = list(range(board.n))
+    improved = True
+    while improved and board.cost:
+        improved = False
+        if shuffle:
+            random.shuffle(columns)
+        for i in columns:
+            if board.conflicts(i):
+                j = min(range(board.n), key=lambda j: board.swap_delta(i, j))
+                if board.swap_delta(i, j) < 0:
+                    board.swap(i, j)
+                    improved = True
+    return board.positions
+
+# Two preallocated populations used alternately: one holds the parents while the children are written into the other.
+# The scratch arrays below are everything the generation loop needs, so it allocates no arrays of its own.
+class GenerationBuffers:
+    def __init__(self, population_size, n, dtype, rng):
+        self.population = np.empty((population_size, n), dtype=dtype)
+        self.offspring = np.empty_like(self.population)
+        self.fitnesses = np.empty(population_size, dtype=np.int64)
+        num_picks = 2 * (population_size - 1)
+        self.parents = np.empty(num_picks, dtype=np.intp)
+        self.counter = DiagonalCounter(population_size, n)
+        # Crossover scratch, reused for every child
+        self.columns = np.arange(n)
+        self.genes = np.empty(n, dtype=dtype)
+        self.mapped = np.empty(n, dtype=dtype)
+        self.mapping = np.empty(n, dtype=dtype)
+        self.position = np.empty(n, dtype=np.intp)
+        self.labels = np.empty(n, dtype=np.intp)
+        self.step = np.empty(n, dtype=np.intp)
+        self.spare = np.empty(n, dtype=np.intp)
+        self.mask = np.empty(n, dtype=bool)
+        self.spare_mask = np.empty(n, dtype=bool)
+        # Selection scratch; rng is a numpy Generator, whose draws can be written into a buffer
+        self.rng = rng
+        self.picks = np.arange(num_picks)
+        self.uniform = np.empty((num_picks, TOURNAMENT_SIZE))
+        self.contenders = np.empty((num_picks, TOURNAMENT_SIZE), dtype=np.intp)
+        self.contender_fitnesses = np.empty((num_picks, TOURNAMENT_SIZE), dtype=np.int64)
+        self.winners = np.empty(num_picks, dtype=np.intp)
+        self.flat = np.empty(num_picks, dtype=np.intp)
+        # Elite as it was after its last repair
+        self.repaired = np.empty(n, dtype=dtype)
+        self.wheel = np.empty(population_size)
+        self.edges = np.empty(population_size, dtype=np.intp)
+        self.pointers_below = np.empty(num_picks + 1, dtype=np.intp)
+
+    def swap(self):
+        self.population, self.offspring = self.offspring, self.population
+
+# Raise ValueError unless the 1-based initial state and the 0-based warm-start boards are permutations
+def check_permutation_inputs(n, initial_state=None, warm_start=None):
+    if initial_state and sorted(initial_state) != list(range(1, n + 1)):
+        raise ValueError("The permutation GA needs an initial state that is a permutation of 1..n.")
+    for board in warm_start or []:
+        if sorted(int(row) for row in board) != list(range(n)):
+            raise ValueError("The permutation GA needs warm-start boards that are permutations of 0..n-1.")
+
+# One population of the permutation GA. The operators keep every chromosome a permutation, so
+# queens never share a row and fitness only counts diagonals; each generation the best chromosome
+# (when it changed) and one random member are repaired, by swaps. Each generation writes its children in place into the second
+# of two preallocated buffers. The fitnesses always belong to the current population.
+class Island:
+    def __init__(self, n, population_size, crossover_rate, mutation_rate, crossover_operator="ox", selection="tournament", scorer=None):
+        if crossover_operator not in CROSSOVER_OPERATORS:
+            raise ValueError(f"Unknown crossover operator {crossover_operator!r}; choose from {sorted(CROSSOVER_OPERATORS)}")
+        if selection not in SELECTION_METHODS:
+            raise ValueError(f"Unknown selection method {selection!r}; choose from {sorted(SELECTION_METHODS)}")
+        self.n = n
+        self.population_size = population_size
+        self.crossover_rate = crossover_rate
+        self.mutation_rate = mutation_rate
+        self.cross = CROSSOVER_OPERATORS[crossover_operator]
+        self.select = SELECTION_METHODS[selection]
+        # The generator follows the caller's seeding of numpy.random
+        self.buffers = GenerationBuffers(population_size, n, gene_dtype(n), np.random.default_rng(np.random.randint(2 ** 31)))
+        self.count_pairs = self.buffers.counter if scorer is None else scorer.attacking_pairs_batch
+        self.target_fitness = max_pairs(n)
+        self.best_solution = None
+        self.best_fitness = -1
+        self.best_index = 0
+        self.elite_repaired = False
+
+    # Start a new run from random permutations or the 1-based initial state; warm-start boards replace the first chromosomes
+    def reset(self, initial_state=None, warm_start=None):
+        n = self.n
+        check_permutation_inputs(n, initial_state, warm_start)
+        population = self.buffers.population
+        if initial_state:
+            population[:] = np.array(initial_state) - 1
+        else:
+            population[:] = np.argsort(np.random.random((self.population_size, n)), axis=1)
+        for i, board in enumerate(warm_start_boards(warm_start, self.population_size)):
+            population[i] = board
+        self.best_solution = None
+        self.best_fitness = -1
+        self.elite_repaired = False
+
+    # Score the population, repair its best chromosome and one random member, and keep the best found so far.
+    # Repairing an elite that survived unchanged would only give the same board again, so it is skipped;
+    # the random member keeps a population whose elite is stuck supplied with new local optima.
+    def evaluate(self, instrumentation=NULL_INSTRUMENTATION):
+        buffers = self.buffers
+        population, fitnesses = buffers.population, buffers.fitnesses
+        with instrumentation.phase("fitness"):
+            np.subtract(self.target_fitness, self.count_pairs(population), out=fitnesses)
+        with instrumentation.phase("repair"):
+            best_index = int(np.argmax(fitnesses))
+            np.not_equal(population[best_index], buffers.repaired, out=buffers.mask)
+            if not self.elite_repaired or buffers.mask.any():
+                self._repair(best_index)
+                buffers.repaired[:] = population[best_index]
+                self.elite_repaired = True
+            self._repair(random.randrange(self.population_size))
+        self._track_best(int(np.argmax(fitnesses)))
+
+    def _repair(self, index):
+        population = self.buffers.population
+        population[index] = swap_repair(population[index].tolist(), shuffle=True)
+        self.buffers.fitnesses[index] = self.target_fitness - self.count_pairs(population[index:index + 1])[0]
+
+    def _track_best(self, best_index):
+        self.best_index = best_index
+        if self.buffers.fitnesses[best_index] > self.best_fitness:
+            self.best_fitness = int(self.buffers.fitnesses[best_index])
+            self.best_solution = self.buffers.population[best_index].tolist()
+
+    def solved(self):
+        return self.best_fitness == self.target_fitness
+
+    # Write the next generation into the offspring buffer and make it the current population
+    def breed(self, instrumentation=NULL_INSTRUMENTATION):
+        buffers = self.buffers
+        population, offspring = buffers.population, buffers.offspring
+        with instrumentation.phase("selection"):
+            parents = self.select(buffers.fitnesses, buffers.parents, buffers)
+            offspring[0] = population[self.best_index]  # Elitism: the best chromosome survives unchanged
+            for i in range(1, self.population_size):
+                parent1, parent2, child = population[parents[2 * i - 2]], population[parents[2 * i - 1]], offspring[i]
+                if random.random() < self.crossover_rate:
+                    self.cross(parent1, parent2, child, buffers)
+                else:
+                    child[:] = parent1
+                swap_mutation(child, self.mutation_rate)
+            buffers.swap()
+
+    # Run up to the given number of generations, stopping at a solution; returns the number run
+    def evolve(self, generations):
+        for generation in range(generations):
+            if self.solved():
+                return generation
+            self.breed()
+            self.evaluate()
+        return generations
+
+    # Copies of the count fittest chromosomes of the current population
+    def emigrants(self, count):
+        fittest = np.argsort(self.buffers.fitnesses)[::-1][:count]
+        return self.buffers.population[fittest].copy()
+
+    # Replace the least fit chromosomes with migrants from other islands
+    def immigrate(self, migrants):
+        migrants = migrants[:self.population_size]
+        weakest = np.argsort(self.buffers.fitnesses)[:len(migrants)]
+        self.buffers.population[weakest] = migrants
+        self.buffers.fitnesses[weakest] = self.target_fitness - self.count_pairs(migrants)
+        self._track_best(int(np.argmax(self.buffers.fitnesses)))
+
+# Genetic Algorithm on permutation chromosomes held as rows of a compact integer array (see Island)
+def permutation_genetic_algorithm(n, population_size, max_generations, crossover_rate, mutation_rate, initial_state=None, runs=1, crossover_operator="ox", selection="tournament", instrumentation=None, budget=None, warm_start=None, scorer=None):
+    island = Island(n, population_size, crossover_rate, mutation_rate, crossover_operator, selection, scorer)
+    instrumentation = resolve(instrumentation)
+    budget = budget or UNLIMITED
+    best_solution_overall = None
+    best_fitness_overall = -1
+    best_solution_any = None
+    best_fitness_any = -1
+    target_fitness = max_pairs(n)
+
+    for run in range(runs):
+        if run and budget.exhausted(target_fitness - best_fitness_any):
+            break
+        instrumentation.start("ga", n=n, permutation=True, crossover=crossover_operator, selection=selection, run=run)
+        island.reset(initial_state, warm_start)
+        island.evaluate(instrumentation)
+        instrumentation.iteration(target_fitness - island.best_fitness)
+        for generation in range(1, max_generations):
+            if island.solved() or budget.exhausted(target_fitness - island.best_fitness):
+                break  # Stop if a valid solution is found or the budget is spent
+            island.breed(instrumentation)
+            island.evaluate(instrumentation)
+            instrumentation.iteration(target_fitness - island.best_fitness)
+        best_solution, best_fitness = island.best_solution, island.best_fitness
+        instrumentation.finish(best_cost=target_fitness - best_fitness)
+
+        if best_fitness == target_fitness and best_fitness > best_fitness_overall:
+            best_solution_overall = best_solution
+            best_fitness_overall = best_fitness
+        if best_fitness > best_fitness_any:
+            best_solution_any = best_solution
+            best_fitness_any = best_fitness
+
+    if best_solution_overall is None and budget.anytime:
+        return best_solution_any
+    return best_solution_overall
+
+# Generations each island evolves on its own between migrations
+MIGRATION_INTERVAL = 20
+MIGRATION_TOPOLOGIES = ("ring", "random")
+
+# Worker process that owns one island for the whole island GA call.
+# Only the island's best and its emigrants go back to the parent, and only immigrants come in.
+# An exception is sent back in place of the next report and ends the worker.
+def island_worker(connection, island_args, seed):
+    random.seed(seed)
+    np.random.seed(seed)
+    try:
+        island = Island(*island_args)
+        while True:
+            command, *args = connection.recv()
+            if command == 'close':
+                break
+            if command == 'reset':
+                initial_state, warm_start, num_migrants = args
+                island.reset(initial_state, warm_start)
+                island.evaluate()
+                connection.send((island.best_fitness, island.best_solution, 1, island.emigrants(num_migrants)))
+            elif command == 'evolve':
+                generations, num_migrants = args
+                evolved = island.evolve(generations)
+                connection.send((island.best_fitness, island.best_solution, evolved, island.emigrants(num_migrants)))
+            elif command == 'immigrate':
+                island.immigrate(*args)
+    except Exception as error:
+        connection.send(error)
+    connection.close()
+
+# Island-model GA: num_islands populations of population_size each evolve in their own worker
+# processes, and every migration_interval generations each island sends copies of its num_migrants
+# fittest chromosomes to the next island ("ring") or to a random other island ("random"),
+# where they replace the least fit.
+def island_genetic_algorithm(n, population_size, max_generations, crossover_rate, mutation_rate, initial_state=None, runs=1, num_islands=None, migration_interval=MIGRATION_INTERVAL, num_migrants=2, topology="ring", crossover_operator="ox", selection="tournament", seed=None, instrumentation=None, budget=None, warm_start=None):
+    if topology not in MIGRATION_TOPOLOGIES:
+        raise ValueError(f"Unknown migration topology {topology!r}; choose from {list(MIGRATION_TOPOLOGIES)}")
+    if current_process().daemon:
+        raise RuntimeError("The island GA cannot run in a daemonic process such as a Multi_run.run_many() worker.")
+    # Check the options and boards before starting workers
+    Island(n, 1, crossover_rate, mutation_rate, crossover_operator, selection)
+    check_permutation_inputs(n, initial_state, warm_start)
+    instrumentation = resolve(instrumentation)
+    budget = budget or UNLIMITED
+    num_islands = max(1, num_islands or cpu_count())
+    if seed is None:
+        seed = int(np.random.randint(2 ** 31))  # Follow the caller's seeding of numpy.random
+    target_fitness = max_pairs(n)
+    best_solution_overall = None
+    best_fitness_overall = -1
+    best_solution_any = None
+    best_fitness_any = -1
+
+    island_args = (n, population_size, crossover_rate, mutation_rate, crossover_operator, selection)
+    connections = []
+    workers = []
+    for island_seed in run_seeds(num_islands, seed):
+        parent_connection, child_connection = Pipe()
+        worker = Process(target=island_worker, args=(child_connection, island_args, island_seed), daemon=True)
+        worker.start()
+        child_connection.close()
+        connections.append(parent_connection)
+        workers.append(worker)
+
+    # Send one command to every island and collect their (best fitness, best solution, generations, emigrants),
+    # re-raising the first exception a worker reports
+    def broadcast(messages):
+        for connection, message in zip(connections, messages):
+            connection.send(message)
+        reports = [connection.recv() for connection in connections]
+        for report in reports:
+            if isinstance(report, BaseException):
+                raise report
+        return reports
+
+    try:
+        for run in range(runs):
+            if run and budget.exhausted(target_fitness - best_fitness_any):
+                break
+            instrumentation.start("ga", n=n, islands=num_islands, topology=topology, run=run)
+            # Warm-start boards are dealt out to the islands in turn
+            reports = broadcast([('reset', initial_state, (warm_start or [])[island::num_islands], num_migrants)
+                                 for island in range(num_islands)])
+            generations = 1
+            while True:
+                budget.charge(population_size * sum(report[2] for report in reports))  # Scored in the workers
+                best_fitness, best_solution = max(reports, key=lambda report: report[0])[:2]
+                instrumentation.iteration(target_fitness - best_fitness)
+                if (best_fitness == target_fitness or generations >= max_generations
+                        or budget.exhausted(target_fitness - best_fitness)):
+                    break
+                if num_islands > 1 and num_migrants > 0:
+                    with instrumentation.phase("migration"):
+                        if topology == "ring":
+                            destinations = [(island + 1) % num_islands for island in range(num_islands)]
+                        else:
+                            destinations = [(island + np.random.randint(1, num_islands)) % num_islands for island in range(num_islands)]
+                        arrivals = [[] for _ in range(num_islands)]
+                        for report, destination in zip(reports, destinations):
+                            arrivals[destination].append(report[3])
+                        for connection, migrants in zip(connections, arrivals):
+                            if migrants:
+                                connection.send(('immigrate', np.vstack(migrants)))
+                epoch = min(migration_interval, max_generations - generations)
+                with instrumentation.phase("evolution"):
+                    reports = broadcast([('evolve', epoch, num_migrants)] * num_islands)
+                generations += epoch
+            instrumentation.finish(best_cost=target_fitness - best_fitness)
+
+            if best_fitness == target_fitness and best_fitness > best_fitness_overall:
+                best_solution_overall = best_solution
+                best_fitness_overall = best_fitness
+            if best_fitness > best_fitness_any:
+                best_solution_any = best_solution
+                best_fitness_any = best_fitness
+    finally:
+        # Workers that failed have already exited, so their pipes may be broken
+        for connection in connections:
+            try:
+                connection.send(('close',))
+            except (BrokenPipeError, EOFError, OSError):
+                pass
+            connection.close()
+        for worker in workers:
+            worker.join(timeout=1)
+            if worker.is_alive():
+                worker.terminate()
+                worker.join()
+
+    if best_solution_overall is None and budget.anytime:
+        return best_solution_any
+    return best_solution_overall
+
 # Main function implementing the Genetic Algorithm for solving the N-Queens problem
-def genetic_algorithm(n, population_size, max_generations, crossover_rate, mutation_rate, initial_state=None, runs=1):
+def genetic_algorithm(n, population_size, max_generations, crossover_rate, mutation_rate, initial_state=None, runs=1, batched=False, instrumentation=None, budget=None, warm_start=None, permutation=False, crossover_operator="ox", selection="tournament", islands=None, migration_interval=MIGRATION_INTERVAL, num_migrants=2, topology="ring", scorer=None):
+    if islands:
+        return island_genetic_algorithm(n, population_size, max_generations, crossover_rate, mutation_rate, initial_state, runs, islands, migration_interval, num_migrants, topology, crossover_operator, selection, instrumentation=instrumentation, budget=budget, warm_start=warm_start)
+    if permutation:
+        return permutation_genetic_algorithm(n, population_size, max_generations, crossover_rate, mutation_rate, initial_state, runs, crossover_operator, selection, instrumentation, budget, warm_start, scorer)
+    if batched:
+        return batched_genetic_algorithm(n, population_size, max_generations, crossover_rate, mutation_rate, initial_state, runs, instrumentation, budget, warm_start, scorer)
+    instrumentation = resolve(instrumentation)
+    budget = budget or UNLIMITED
     best_solution_overall = None
     best_fitness_overall = -1
+    best_solution_any = None
+    best_fitness_any = -1
+    target_fitness = max_pairs(n)
 
     for run in range(runs):
+        if run and budget.exhausted(target_fitness - best_fitness_any):
+            break
+        instrumentation.start("ga", n=n, batched=False, run=run)
         population = [create_initial_state(n, initial_state) for _ in range(population_size)]
+        for i, board in enumerate(warm_start_boards(warm_start, population_size)):
+            population[i] = board
         best_solution = None
         best_fitness = -1
 
         for generation in range(max_generations):
-            # Apply local search to each chromosome in the population
-            population = [local_search(chromosome) for chromosome in population]
-            population = [repair(chromosome) for chromosome in population]
-            fitnesses = [fitness(chromosome) for chromosome in population]
+            # Apply local search to each chromosome in the population; once the budget is spent
+            # the remaining chromosomes are only scored, so the generation ends promptly
+            with instrumentation.phase("local_search"):
+                population = [chromosome if budget.exhausted() else local_search(chromosome) for chromosome in population]
+            with instrumentation.phase("repair"):
+                population = [chromosome if budget.exhausted() else repair(chromosome, budget) for chromosome in population]
+            with instrumentation.phase("fitness"):
+                fitnesses = [fitness(chromosome) for chromosome in population]
             # Ensure there are no zero or negative fitness values
             if all(f <= 0 for f in fitnesses):
                 print("All chromosomes have zero or negative fitness. Adjust mutation or fitness calculation.")
+                instrumentation.finish(best_cost=target_fitness - best_fitness)
                 return None
 
             # Sort the population by fitness in descending order
@@ -134,31 +715,38 @@ def genetic_algorithm(n, population_size, max_generations, crossover_rate, mutat
             best_current_fitness = fitnesses[0]
             if best_current_fitness > best_fitness:
                 best_fitness = best_current_fitness
-                best_solution = population[0]
+                best_solution = population[0][:]  # Copy, as mutation changes chromosomes in place
+            instrumentation.iteration(target_fitness - best_fitness)
 
-            if is_solution_valid(best_solution) and best_fitness == (n*(n-1))//2:
+            if best_fitness == target_fitness and is_valid_solution(best_solution, base=0):
                 break  # Stop if a valid solution is found
+            if budget.exhausted(target_fitness - best_fitness):
+                break
 
-            new_population = []
-            while len(new_population) < population_size:
-                if sum(fitnesses) == 0:
-                    fitnesses = [f + 1 for f in fitnesses]
-                parent1, parent2 = select_parents(population, fitnesses)
-                child1, child2 = crossover(parent1, parent2, crossover_rate)
-                new_population.append(mutate(child1, mutation_rate))
-                if len(new_population) < population_size:
-                    new_population.append(mutate(child2, mutation_rate))
+            with instrumentation.phase("selection"):
+                new_population = []
+                while len(new_population) < population_size:
+                    if sum(fitnesses) == 0:
+                        fitnesses = [f + 1 for f in fitnesses]
+                    parent1, parent2 = select_parents(population, fitnesses)
+                    child1, child2 = crossover(parent1, parent2, crossover_rate)
+                    new_population.append(mutate(child1, mutation_rate))
+                    if len(new_population) < population_size:
+                        new_population.append(mutate(child2, mutation_rate))
 
-            population = new_population[:population_size]  # Ensure the population size remains constant
+                population = new_population[:population_size]  # Ensure the population size remains constant
+        instrumentation.finish(best_cost=target_fitness - best_fitness)
 
-        if best_solution and is_solution_valid(best_solution):
+        if best_solution and is_valid_solution(best_solution, base=0):
             if best_fitness > best_fitness_overall:
                 best_solution_overall = best_solution
                 best_fitness_overall = best_fitness
-            
-        else:
-            pass
+        if best_fitness > best_fitness_any:
+            best_solution_any = best_solution
+            best_fitness_any = best_fitness
 
+    if best_solution_overall is None and budget.anytime:
+        return best_solution_any
     return best_solution_overall
 
 
@@ -217,12 +805,13 @@ if __name__ == "__main__":
 
     runs = int(input("How many times would you like to run the algorithm? The number runs increase the chance of getting solutions"))
     start_time = time.time()
-    best_solution = genetic_algorithm(n, **params, initial_state=initial_positions, runs=runs)
+    # Independent runs go to all cores; the first valid solution is printed as a JSON line and ends the search
+    with SolutionWriter(format="jsonl") as writer:
+        for run, solution in run_many(genetic_algorithm, runs, args=(n,), kwargs=dict(params, initial_state=initial_positions),
+                                      target_solutions=1, writer=writer):
+            pass
     elapsed_time = time.time() - start_time
 
-    if best_solution:
-        best_solution_printable = [x + 1 for x in best_solution]
-        print(f"Best solution found: {best_solution_printable}")
-    else:
+    if not writer.written:
         print("Failed to find a solution.")
     print(f"Elapsed time: {elapsed_time:.2f} seconds.")
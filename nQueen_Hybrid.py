@@ -0,0 +1,179 @@
+"""Hybrid pipeline: metaheuristic candidates repaired by min-conflicts.
+
+One stage generates candidate boards: ants constructing placements (ACO), a
+permutation-GA population, PSO personal bests or plain random permutations.
+The candidates are streamed, best first within each batch, to a pool of
+worker processes that repair each one with a single bounded min-conflicts
+attempt. The first repaired solution is returned and the remaining work is
+cancelled.
+
+Only a few candidates per worker are in flight at a time, so the generator
+runs just ahead of the repair stage instead of filling memory.
+"""
+import queue
+import random
+from multiprocessing import Pool, cpu_count, current_process
+
+import numpy as np
+
+import Conflict_count
+import nQueen_ACO
+import nQueen_GE
+import nQueen_PS0
+from Budget import UNLIMITED
+from Instrumentation import resolve
+from Solution_store import warm_start_boards
+from nQueen_MinConflict import min_conflicts
+
+# Parameter sets for the hybrid pipeline, one per candidate generator
+HYBRID_PARAMETER_SETS = {
+    1: {"generator": "aco"},
+    2: {"generator": "ga"},
+    3: {"generator": "pso"},
+    4: {"generator": "random"},
+}
+
+# Candidates handed out per worker before waiting for a result
+IN_FLIGHT_PER_WORKER = 2
+# Candidates tried before giving up
+MAX_CANDIDATES = 1000
+
+
+def random_candidates(n, batch_size):
+    """Yield batches of random permutations."""
+    while True:
+        yield np.argsort(np.random.random((batch_size, n)), axis=1)
+
+
+def aco_candidates(n, batch_size, params=None):
+    """Yield the ants' placements of each ACO iteration, fittest first, while the trails keep learning."""
+    params = dict(params or nQueen_ACO.ACO_PARAMETER_SETS[1], num_ants=batch_size)
+    colony = nQueen_ACO.ACO(n, **params)
+    while True:
+        solutions = colony.construct_solutions()
+        fitnesses = colony.score(solutions)
+        colony.update_pheromone(solutions, fitnesses)
+        yield solutions[np.argsort(-fitnesses, kind='stable')]
+
+
+def ga_candidates(n, batch_size, params=None):
+    """Yield each generation of a permutation-GA population of batch_size, fittest first."""
+    params = params or nQueen_GE.GA_PARAMETER_SETS[1]
+    island = nQueen_GE.Island(n, batch_size, params["crossover_rate"], params["mutation_rate"])
+    island.reset()
+    island.evaluate()
+    while True:
+        fitnesses = island.buffers.fitnesses
+        yield island.buffers.population[np.argsort(-fitnesses, kind='stable')]
+        island.breed()
+        island.evaluate()
+
+
+def pso_candidates(n, batch_size, params=None):
+    """Yield the personal bests of a swarm of batch_size particles after each move, best first."""
+    params = params or nQueen_PS0.PARAMETER_SETS[1]
+    swarm = nQueen_PS0.Swarm(np.arange(n), batch_size)
+    g_best_position = swarm.current_best()[1]
+    while True:
+        swarm.move(params["w"], params["c1"], params["c2"], g_best_position)
+        g_best_position = swarm.best_positions[int(np.argmax(swarm.best_scores))].copy()
+        yield swarm.best_positions[np.argsort(-swarm.best_scores, kind='stable')]
+
+
+# Generator name -> function(n, batch_size) yielding 2-D batches of candidate boards
+GENERATORS = {
+    "aco": aco_candidates,
+    "ga": ga_candidates,
+    "pso": pso_candidates,
+    "random": random_candidates,
+}
+
+
+def _repair(job):
+    """Worker task: one min-conflicts attempt starting from a candidate; returns a solution or None."""
+    candidate, seed, max_steps = job
+    return min_conflicts(len(candidate), seed=seed, max_steps=max_steps, max_restarts=0, initial=candidate)
+
+
+def candidate_stream(n, generator, batch_size, warm_start=None):
+    """Yield single candidates as lists of rows: warm-start boards first, then the generator's batches."""
+    yield from warm_start_boards(warm_start)
+    for batch in GENERATORS[generator](n, batch_size):
+        for candidate in batch.tolist():
+            yield candidate
+
+
+def hybrid(n, generator="aco", batch_size=None, processes=None, max_candidates=MAX_CANDIDATES, max_steps=None,
+           seed=None, instrumentation=None, budget=None, warm_start=None):
+    """Repair candidates from the given generator until one becomes a solution; return it or None.
+
+    ``batch_size`` is the number of candidates per generator batch (ants,
+    population or swarm size; 4 * processes by default). ``max_steps`` bounds
+    each repair attempt as in min_conflicts(). In a Multi_run.run_many()
+    worker the candidates are repaired in the calling process.
+    """
+    if generator not in GENERATORS:
+        raise ValueError(f"Unknown candidate generator {generator!r}; choose from {sorted(GENERATORS)}")
+    if n in (2, 3) or n < 1:
+        return None
+    instrumentation = resolve(instrumentation)
+    budget = budget or UNLIMITED
+    if processes is None:
+        processes = cpu_count()
+    processes = max(1, processes)
+    if current_process().daemon:
+        processes = 1
+    batch_size = batch_size or 4 * processes
+    rng = random.Random(random.getrandbits(32) if seed is None else seed)  # Follows the caller's seeding of random
+    jobs = ((candidate, rng.getrandbits(32), max_steps)
+            for candidate in candidate_stream(n, generator, batch_size, warm_start))
+
+    instrumentation.start("hybrid", n=n, generator=generator, processes=processes)
+    solution = None
+    tried = 0
+    if processes == 1:
+        for job in jobs:
+            if tried >= max_candidates or budget.exhausted():
+                break
+            with instrumentation.phase("repair"):
+                solution = _repair(job)
+            tried += 1
+            instrumentation.iteration(0 if solution else None)
+            if solution:
+                break
+        instrumentation.finish(best_cost=0 if solution else None, candidates=tried)
+        return solution
+
+    # Keep a bounded number of repairs in flight and hand out a new candidate as each one finishes
+    results = queue.Queue()
+    pool = Pool(processes=processes)
+    try:
+        in_flight = 0
+        submitted = 0
+        while True:
+            while in_flight < IN_FLIGHT_PER_WORKER * processes and submitted < max_candidates:
+                with instrumentation.phase("generation"):
+                    job = next(jobs)
+                pool.apply_async(_repair, (job,), callback=results.put, error_callback=results.put)
+                in_flight += 1
+                submitted += 1
+            if in_flight == 0:
+                break
+            with instrumentation.phase("repair"):
+                result = results.get()
+            in_flight -= 1
+            tried += 1
+            Conflict_count.evaluations += 1  # Counted here, as the serial path's repair counts its board
+            if isinstance(result, BaseException):
+                raise result
+            instrumentation.iteration(0 if result else None)
+            if result:
+                solution = result
+                break
+            if budget.exhausted():
+                break
+    finally:
+        pool.terminate()
+        pool.join()
+    instrumentation.finish(best_cost=0 if solution else None, candidates=tried)
+    return solution
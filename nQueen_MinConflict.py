@@ -0,0 +1,162 @@
+"""Min-conflicts solver for very large N-Queens boards (n in the hundreds of thousands and up).
+
+The board is kept as a permutation, so no two queens share a row and only
+the diagonals can conflict. The queen rows and the diagonal counters live
+in compact ``array('i')`` buffers, which keeps memory linear in n. A greedy
+initialisation places almost every queen without conflicts; the few that are
+left are repaired with swaps picked from a set of conflicted queens.
+"""
+import random
+from array import array
+
+import Conflict_count
+from Budget import UNLIMITED
+
+# Random rows tried per column during the greedy initialisation
+GREEDY_TRIES = 20
+# Random partners tried per conflicted queen before it is put back in the set
+SWAP_TRIES = 50
+# Repair picks between two budget checks
+BUDGET_CHECK_INTERVAL = 1024
+
+
+def _greedy_permutation(n, rng, budget=UNLIMITED):
+    """Return (queen, diagonals, anti_diagonals) for a greedily placed permutation, or None if the budget ran out."""
+    queen = array('i', range(n))
+    diagonals = array('i', bytes(4 * (2 * n - 1)))
+    anti_diagonals = array('i', bytes(4 * (2 * n - 1)))
+    offset = n - 1
+    for col in range(n):
+        if col % BUDGET_CHECK_INTERVAL == BUDGET_CHECK_INTERVAL - 1 and budget.exhausted():
+            return None
+        remaining = n - col
+        # Swap a random unused row into this column until one is free on both diagonals
+        for _ in range(GREEDY_TRIES):
+            other = col + int(rng.random() * remaining)
+            queen[col], queen[other] = queen[other], queen[col]
+            row = queen[col]
+            if not diagonals[row - col + offset] and not anti_diagonals[row + col]:
+                break
+        row = queen[col]
+        diagonals[row - col + offset] += 1
+        anti_diagonals[row + col] += 1
+    return queen, diagonals, anti_diagonals
+
+
+def _from_board(board, rng):
+    """Return (queen, diagonals, anti_diagonals) for a given board of 0-based rows.
+
+    Rows used by more than one queen are kept for the first of them; the other
+    queens get the unused rows in random order, so the result is a permutation.
+    """
+    n = len(board)
+    queen = array('i', (int(row) for row in board))
+    used = bytearray(n)
+    repeated = []
+    for col, row in enumerate(queen):
+        if used[row]:
+            repeated.append(col)
+        used[row] = 1
+    free = [row for row in range(n) if not used[row]]
+    rng.shuffle(free)
+    for col, row in zip(repeated, free):
+        queen[col] = row
+    diagonals = array('i', bytes(4 * (2 * n - 1)))
+    anti_diagonals = array('i', bytes(4 * (2 * n - 1)))
+    offset = n - 1
+    for col, row in enumerate(queen):
+        diagonals[row - col + offset] += 1
+        anti_diagonals[row + col] += 1
+    return queen, diagonals, anti_diagonals
+
+
+def _conflicted(queen, diagonals, anti_diagonals, n):
+    """Return the columns whose queen shares a diagonal with another queen."""
+    offset = n - 1
+    return [col for col in range(n)
+            if diagonals[queen[col] - col + offset] > 1 or anti_diagonals[queen[col] + col] > 1]
+
+
+def min_conflicts(n, seed=None, max_steps=None, max_restarts=100, initial=None, budget=None):
+    """Return a solution for an n x n board as a list of rows, or None if none was found.
+
+    Each attempt starts from a fresh greedy permutation and performs at most
+    ``max_steps`` repair picks (10 * n + 1000 by default) before restarting.
+    With an ``initial`` board of 0-based rows, the first attempt repairs that
+    board instead, after giving queens that share a row unused rows.
+
+    A ``budget`` is checked before every attempt and every
+    BUDGET_CHECK_INTERVAL picks; each attempt counts as one evaluation, for
+    the full scoring of its starting board.
+    """
+    if n in (2, 3) or n < 1:
+        return None
+    budget = budget or UNLIMITED
+    rng = random.Random(seed)
+    if max_steps is None:
+        max_steps = 10 * n + 1000
+    offset = n - 1
+
+    for attempt in range(max_restarts + 1):
+        if budget.exhausted():
+            return None
+        if attempt == 0 and initial is not None:
+            queen, diagonals, anti_diagonals = _from_board(initial, rng)
+        else:
+            placed = _greedy_permutation(n, rng, budget)
+            if placed is None:
+                return None
+            queen, diagonals, anti_diagonals = placed
+        cost = sum(k * (k - 1) // 2 for k in diagonals) + sum(k * (k - 1) // 2 for k in anti_diagonals)
+        Conflict_count.evaluations += 1
+        candidates = _conflicted(queen, diagonals, anti_diagonals, n)
+
+        for step in range(max_steps):
+            if cost == 0:
+                return queen.tolist()
+            if step % BUDGET_CHECK_INTERVAL == BUDGET_CHECK_INTERVAL - 1 and budget.exhausted(cost):
+                return None
+            if not candidates:
+                candidates = _conflicted(queen, diagonals, anti_diagonals, n)
+            # O(1) random pick: move the last candidate into the picked slot
+            index = int(rng.random() * len(candidates))
+            i = candidates[index]
+            candidates[index] = candidates[-1]
+            candidates.pop()
+            row_i = queen[i]
+            conflicts_i = diagonals[row_i - i + offset] + anti_diagonals[row_i + i] - 2
+            if not conflicts_i:
+                continue
+
+            for _ in range(SWAP_TRIES):
+                j = int(rng.random() * n)
+                row_j = queen[j]
+                if j == i:
+                    continue
+                conflicts_j = diagonals[row_j - j + offset] + anti_diagonals[row_j + j] - 2
+                delta = (diagonals[row_j - i + offset] + anti_diagonals[row_j + i]
+                         + diagonals[row_i - j + offset] + anti_diagonals[row_i + j]
+                         - conflicts_i - conflicts_j)
+                if abs(row_i - row_j) == abs(i - j):
+                    delta += 2
+                if delta < 0:
+                    diagonals[row_i - i + offset] -= 1
+                    anti_diagonals[row_i + i] -= 1
+                    diagonals[row_j - j + offset] -= 1
+                    anti_diagonals[row_j + j] -= 1
+                    diagonals[row_j - i + offset] += 1
+                    anti_diagonals[row_j + i] += 1
+                    diagonals[row_i - j + offset] += 1
+                    anti_diagonals[row_i + j] += 1
+                    queen[i], queen[j] = row_j, row_i
+                    cost += delta
+                    for col in (i, j):
+                        row = queen[col]
+                        if diagonals[row - col + offset] > 1 or anti_diagonals[row + col] > 1:
+                            candidates.append(col)
+                    break
+            else:
+                candidates.append(i)
+        if cost == 0:
+            return queen.tolist()
+    return None
@@ -1,9 +1,17 @@
 """@author: rifat_shaon"""
 import numpy as np
-from multiprocessing import Pool, cpu_count
+from multiprocessing import Pipe, Process, cpu_count, current_process
 import time
 import random
 
+from Budget import UNLIMITED, Budget
+from Conflict_count import Board, attacking_pairs, attacking_pairs_batch
+from Instrumentation import resolve
+from Multi_run import run_many
+from Solution_output import SolutionWriter
+from Solution_store import warm_start_boards
+from Symmetry import DistinctSolutions
+
 # Define sets of parameters for the PSO algorithm
 PARAMETER_SETS = {
     1: {"num_particles": 50, "num_iterations": 500, "w": 0.9, "c1": 1.2, "c2": 2.2},
@@ -11,149 +19,275 @@ PARAMETER_SETS = {
     3: {"num_particles": 150, "num_iterations": 700, "w": 0.7, "c1": 1.4, "c2": 2.0}
 }
 
-# Particle class represents a solution in the search space / population
-class Particle:
-    def __init__(self, initial_position):
-        self.position = initial_position.copy()
-        np.random.shuffle(self.position)
-        self.velocity = np.zeros(len(self.position), dtype=int)
-        self.best_position = np.copy(self.position)
-        self.best_score = -float('inf')
+# Swarms with fewer cells than this run in a single process, where IPC would cost more than it saves
+PARALLEL_THRESHOLD = 100000
+
+# Swarm class holds the whole population as 2-D arrays, one row per particle.
+# With a scorer the positions are the scorer's own boards, so scoring copies nothing.
+class Swarm:
+    def __init__(self, initial_position, num_particles, rng=None, warm_start=None, scorer=None):
+        dimension = len(initial_position)
+        self.rng = np.random if rng is None else rng
+        # Every particle starts from its own shuffle of the initial position
+        order = np.argsort(self.rng.random((num_particles, dimension)), axis=1)
+        self.positions = np.asarray(initial_position)[order]
+        for index, board in enumerate(warm_start_boards(warm_start, num_particles, self.rng)):
+            self.positions[index] = board
+        self.scorer = scorer
+        if scorer is not None and self.positions.dtype == scorer.boards.dtype and num_particles <= len(scorer.boards):
+            scorer.boards[:num_particles] = self.positions
+            self.positions = scorer.boards[:num_particles]
+        self.velocities = np.zeros((num_particles, dimension))
+        self.best_positions = self.positions.copy()
+        self.best_scores = np.full(num_particles, -float('inf'))
+        self.scores = objective_function_batch(self.positions, self.scorer)
+
+    # Update velocities, apply each particle's swap and track personal bests for the whole swarm
+    def move(self, w, c1, c2, g_best_position):
+        num_particles, dimension = self.positions.shape
+        r1 = self.rng.random((num_particles, 1))
+        r2 = self.rng.random((num_particles, 1))
+        self.velocities = (w * self.velocities
+                           + c1 * r1 * (self.best_positions - self.positions)
+                           + c2 * r2 * (g_best_position - self.positions))
+        rows = np.arange(num_particles)
+        swap_idx1 = (np.abs(self.velocities[:, 0]) % dimension).astype(int)
+        swap_idx2 = (np.abs(self.velocities[:, 1]) % dimension).astype(int)
+        swapped = self.positions[rows, swap_idx1]
+        self.positions[rows, swap_idx1] = self.positions[rows, swap_idx2]
+        self.positions[rows, swap_idx2] = swapped
+        self.positions %= dimension
+
+        self.scores = objective_function_batch(self.positions, self.scorer)
+        improved = self.scores > self.best_scores
+        self.best_positions[improved] = self.positions[improved]
+        self.best_scores[improved] = self.scores[improved]
+
+    # Reinitialise each particle with the given probability
+    def restart(self, probability):
+        num_particles, dimension = self.positions.shape
+        chosen = self.rng.random(num_particles) < probability
+        fresh = np.argsort(self.rng.random((int(chosen.sum()), dimension)), axis=1)
+        self.positions[chosen] = fresh
+        self.best_positions[chosen] = fresh
+        self.scores[chosen] = objective_function_batch(fresh)  # In process: the scorer's block holds the swarm
+        self.best_scores[chosen] = self.scores[chosen]
+
+    # Score and copy of the best current position in the swarm
+    def current_best(self):
+        index = np.argmax(self.scores)
+        return self.scores[index], self.positions[index].copy()
+
+    # Apply local search to every personal best and return the best score and position found,
+    # leaving the remaining particles as they are once the budget is spent
+    def polish(self, budget=UNLIMITED):
+        for index in range(len(self.best_positions)):
+            if budget.exhausted():
+                break
+            improved_position = local_search(self.best_positions[index], budget)
+            improved_score = objective_function(improved_position)
+            if improved_score > self.best_scores[index]:
+                self.best_positions[index] = improved_position
+                self.best_scores[index] = improved_score
+        index = np.argmax(self.best_scores)
+        return self.best_scores[index], self.best_positions[index].copy()
+
+# Worker process that owns one shard of the swarm for the whole PSO call
+def swarm_worker(connection, initial_position, num_particles, seed, warm_start=None):
+    rng = np.random.default_rng(seed)
+    swarm = None
+    while True:
+        command, *args = connection.recv()
+        if command == 'close':
+            break
+        if command == 'reset':
+            swarm = Swarm(initial_position, num_particles, rng, warm_start)
+            connection.send(swarm.current_best())
+        elif command == 'move':
+            swarm.move(*args)
+            connection.send(swarm.current_best())
+        elif command == 'restart':
+            swarm.restart(*args)
+            connection.send(swarm.current_best())
+        elif command == 'polish':
+            # The parent's clock is not shared, so the budget arrives as the seconds left
+            time_limit, = args
+            connection.send(swarm.polish(UNLIMITED if time_limit is None else Budget(time_limit)))
+    connection.close()
+
+# SwarmEngine splits the swarm into fixed shards, one per worker process.
+# Only the global best goes out to the workers and only each shard's best score and position come back.
+# With one process the single shard lives in the calling process and no worker is started;
+# it is then scored by the given scorer, if any.
+class SwarmEngine:
+    def __init__(self, initial_position, num_particles, processes=None, seed=None, warm_start=None, scorer=None):
+        self.initial_position = np.asarray(initial_position)
+        self.num_particles = num_particles
+        self.warm_start = warm_start
+        self.scorer = scorer
+        if processes is None:
+            small = num_particles * len(initial_position) < PARALLEL_THRESHOLD
+            processes = 1 if small or current_process().daemon else cpu_count()  # See Multi_run.run_many()
+        processes = max(1, min(processes, num_particles))
+        self.swarm = None
+        self.rng = None if seed is None else np.random.default_rng(seed)
+        self.connections = []
+        self.workers = []
+        if processes > 1:
+            shard_sizes = [len(shard) for shard in np.array_split(np.arange(num_particles), processes)]
+            seeds = np.random.SeedSequence(seed).spawn(processes)
+            for shard_size, shard_seed in zip(shard_sizes, seeds):
+                parent_connection, child_connection = Pipe()
+                worker = Process(target=swarm_worker, args=(child_connection, self.initial_position, shard_size, shard_seed, warm_start), daemon=True)
+                worker.start()
+                child_connection.close()
+                self.connections.append(parent_connection)
+                self.workers.append(worker)
+
+    # Send a command to every shard and return the best (score, position) they report
+    def _broadcast(self, *message):
+        if not self.workers:
+            command, *args = message
+            if command == 'reset':
+                self.swarm = Swarm(self.initial_position, self.num_particles, self.rng, self.warm_start, self.scorer)
+            elif command == 'move':
+                self.swarm.move(*args)
+            elif command == 'restart':
+                self.swarm.restart(*args)
+            elif command == 'polish':
+                return self.swarm.polish(*args)
+            return self.swarm.current_best()
+        for connection in self.connections:
+            connection.send(message)
+        return max((connection.recv() for connection in self.connections), key=lambda result: result[0])
+
+    # Start a new run with freshly initialised shards
+    def reset(self):
+        return self._broadcast('reset')
+
+    def move(self, w, c1, c2, g_best_position):
+        return self._broadcast('move', w, c1, c2, g_best_position)
+
+    def restart(self, probability):
+        return self._broadcast('restart', probability)
+
+    def polish(self, budget=UNLIMITED):
+        if not self.workers:
+            return self._broadcast('polish', budget)
+        return self._broadcast('polish', budget.remaining_time())
+
+    def close(self):
+        for connection in self.connections:
+            connection.send(('close',))
+            connection.close()
+        for worker in self.workers:
+            worker.join()
+        self.connections = []
+        self.workers = []
 
 # Objective function to evaluate the quality of a solution / fitness
 def objective_function(position):
+    return -attacking_pairs(position)
+
+# Objective function for every row of a 2-D array of positions
+def objective_function_batch(positions, scorer=None):
+    count_pairs = attacking_pairs_batch if scorer is None else scorer.attacking_pairs_batch
+    return -count_pairs(positions)
+
+# Local search function to improve a given solution; it stops where it is once the budget is spent
+def local_search(position, budget=UNLIMITED):
     n = len(position)
-    # Count column conflicts
-    column_conflicts = sum(np.bincount(position).clip(0, 1)) - n
-    diagonal_conflicts = 0
-    # Count diagonal conflicts
-    for i in range(n):
-        for j in range(i + 1, n):
-            if position[i] - position[j] == i - j or position[j] - position[i] == i - j:
-                diagonal_conflicts += 1
-    return -(column_conflicts + diagonal_conflicts)
-
-# Local search function to improve a given solution
-def local_search(position):
-    n = len(position)
-    best_position = position.copy()
-    best_score = objective_function(best_position)
+    board = Board(position)
     improved = True
     while improved:
         improved = False
         for i in range(n):
+            if budget.exhausted():
+                return np.array(board.positions, dtype=position.dtype)
             for j in range(n):
-                if i != j:
-                    new_position = best_position.copy()
-                    new_position[i], new_position[j] = new_position[j], new_position[i]
-                    new_score = objective_function(new_position)
-                    if new_score > best_score:
-                        best_position = new_position.copy()
-                        best_score = new_score
-                        improved = True
-    return best_position
+                # A swap improves the objective when it removes attacking pairs
+                if i != j and board.swap_delta(i, j) < 0:
+                    board.swap(i, j)
+                    improved = True
+    return np.array(board.positions, dtype=position.dtype)
 
 # PSO algorithm implementation
-def PSO(num_particles, dimension, num_iterations, w, c1, c2, num_runs, initial_position):
+def PSO(num_particles, dimension, num_iterations, w, c1, c2, num_runs, initial_position, processes=None, seed=None, instrumentation=None, budget=None, warm_start=None, scorer=None):
+    instrumentation = resolve(instrumentation)
+    budget = budget or UNLIMITED
     best_solutions = []
-   
-    # Create a multiprocessing pool to parallelize objective function evaluations
-    pool = Pool(processes=cpu_count())
+
+    # Workers keep their shard of the swarm across iterations and runs
+    engine = SwarmEngine(initial_position, num_particles, processes, seed, warm_start, scorer)
 
     # Diversification: Variable Inertia Weight
     INITIAL_W = w
     FINAL_W = 0.4
 
-    for run in range(num_runs):
-        # Initialize particles
-        particles = [Particle(initial_position) for _ in range(num_particles)]
-        
-        # Determine the global best position
-        g_best_position = max(
-            particles, key=lambda p: objective_function(p.position)).position.copy()
-        g_best_score = objective_function(g_best_position)
-
-        # Initialize previous_g_best_score
-        previous_g_best_score = -float('inf')
-
-        # Diversification: Counter for iterations without improvement
-        no_improvement_counter = 0
-        MAX_ITER_WITHOUT_IMPROVEMENT = 50
-
-        for iteration in range(num_iterations):
-            # Update inertia weight dynamically
-            current_iteration_fraction = iteration / num_iterations
-            w = INITIAL_W - current_iteration_fraction * (INITIAL_W - FINAL_W)
-
-            # Evaluate the objective function for all particles
-            scores = pool.map(objective_function, [
-                              p.position for p in particles])
-            for particle, score in zip(particles, scores):
-                # Update particle velocity and position
-                inertia = w * particle.velocity
-                personal_attraction = c1 * np.random.random() * (particle.best_position -  particle.position)
-                social_attraction = c2 * np.random.random() * (g_best_position - particle.position)
-                particle.velocity = inertia + personal_attraction + social_attraction
-                swap_idx1 = int(abs(particle.velocity[0]) % dimension)
-                swap_idx2 = int(abs(particle.velocity[1]) % dimension)
-                particle.position[swap_idx1], particle.position[swap_idx2] = particle.position[swap_idx2], particle.position[swap_idx1]
-                particle.position = particle.position % dimension
-
-                # Update best positions and scores
-                particle_score = objective_function(particle.position)
-                if particle_score > particle.best_score:
-                    particle.best_score = particle_score
-                    particle.best_position = particle.position.copy()
-                if particle_score > g_best_score:
-                    g_best_score = particle_score
-                    g_best_position = particle.position.copy()
-
-            # Check for improvement
-            if g_best_score > previous_g_best_score:
-                no_improvement_counter = 0
-            else:
-                no_improvement_counter += 1
-
-            # Random Restart if no improvement for a while
-            if no_improvement_counter >= MAX_ITER_WITHOUT_IMPROVEMENT:
-                for particle in particles:
-                    if np.random.rand() < 0.5:  # 50% chance to reinitialize a particle
-                        particle.position = np.random.permutation(dimension)
-                        particle.best_position = particle.position.copy()
-                        particle.best_score = objective_function(
-                            particle.position)
-                no_improvement_counter = 0  # Reset the counter
-
-        # After the iterations, apply local search for each particle's best position
-        for particle in particles:
-            improved_position = local_search(particle.best_position)
-            improved_score = objective_function(improved_position)
-            if improved_score > particle.best_score:
-                particle.best_position = improved_position
-                particle.best_score = improved_score
-            if improved_score > g_best_score:
-                g_best_score = improved_score
-                g_best_position = improved_position.copy()
+    try:
+        for run in range(num_runs):
+            if best_solutions and budget.exhausted():
+                break
+            instrumentation.start("pso", n=dimension, run=run, processes=len(engine.workers) or 1)
+            # Initialize particles and determine the global best position
+            with instrumentation.phase("initialisation"):
+                g_best_score, g_best_position = engine.reset()
+
+            # Initialize previous_g_best_score
+            previous_g_best_score = -float('inf')
 
-        best_solutions.append(g_best_position)
+            # Diversification: Counter for iterations without improvement
+            no_improvement_counter = 0
+            MAX_ITER_WITHOUT_IMPROVEMENT = 50
+
+            for iteration in range(num_iterations):
+                # Update inertia weight dynamically
+                current_iteration_fraction = iteration / num_iterations
+                w = INITIAL_W - current_iteration_fraction * (INITIAL_W - FINAL_W)
+
+                # Update velocities, positions and personal bests of all particles at once
+                with instrumentation.phase("move"):
+                    score, position = engine.move(w, c1, c2, g_best_position)
+                if engine.workers:
+                    budget.charge(num_particles)  # Scored in the worker processes
+                if score > g_best_score:
+                    g_best_score = score
+                    g_best_position = position
+                instrumentation.iteration(-int(g_best_score))
+                if budget.exhausted(-g_best_score):
+                    break
+
+                # Check for improvement
+                if g_best_score > previous_g_best_score:
+                    no_improvement_counter = 0
+                else:
+                    no_improvement_counter += 1
+                previous_g_best_score = g_best_score
+
+                # Random Restart if no improvement for a while
+                if no_improvement_counter >= MAX_ITER_WITHOUT_IMPROVEMENT:
+                    with instrumentation.phase("restart"):
+                        engine.restart(0.5)  # 50% chance to reinitialize a particle
+                    no_improvement_counter = 0  # Reset the counter
+
+            # After the iterations, apply local search for each particle's best position
+            if not budget.exhausted(-g_best_score):
+                with instrumentation.phase("local_search"):
+                    score, position = engine.polish(budget)
+                if score > g_best_score:
+                    g_best_score = score
+                    g_best_position = position
+            instrumentation.finish(best_cost=-int(g_best_score))
+
+            best_solutions.append(g_best_position)
+    finally:
+        engine.close()
 
-    pool.close()
     return best_solutions
 
-# Function to check if a solution is valid for the N-Queens problem
-def is_solution_valid(position):
-    n = len(position)
-    # Check for row and column threats
-    if len(set(position)) != n:
-        return False
-    # Check for diagonal threats
-    for i in range(n):
-        for j in range(i + 1, n):
-            if abs(position[i] - position[j]) == abs(i - j):  # Main diagonal threat
-                return False
-            if position[i] + i == position[j] + j:  # Counter diagonal threat
-                return False
-    return True
+# Single PSO run in the calling process, for use with the multi-run driver
+def PSO_run(num_particles, dimension, num_iterations, w, c1, c2, initial_position, seed=None, budget=None):
+    return PSO(num_particles, dimension, num_iterations, w, c1, c2, 1, initial_position, processes=1, seed=seed, budget=budget)[0]
 
 
 # Main execution
@@ -269,14 +403,13 @@ if __name__ == "__main__":
     print("Wait for the solution......")
     # Run PSO and measure time taken
     start_time = time.time()
-    solutions = PSO(num_particles, n, num_iterations, w, c1, c2, num_runs, initial_position)
+    unique_solutions = DistinctSolutions()
+    # One solution per symmetry class, printed as a JSON line as soon as it is found
+    with SolutionWriter(format="jsonl") as writer:
+        for _ in run_many(PSO_run, num_runs, args=(num_particles, n, num_iterations, w, c1, c2, initial_position),
+                          distinct=unique_solutions, writer=writer):
+            pass
     end_time = time.time()
 
-    # Display results
-    unique_solutions = {tuple(sol)
-                        for sol in solutions if is_solution_valid(sol)}
-    for sol in unique_solutions:
-        print("Solution:", np.array(sol) + 1)  # Adjust for 1-based indexing
-        
-    print(f"\nNumber of unique solutions found: {len(unique_solutions)}")
+    print(f"\nNumber of unique solutions found (up to symmetry): {len(unique_solutions)}")
     print(f"Total time taken: {(end_time - start_time):.2f} seconds")
@@ -0,0 +1,323 @@
+"""Library API and command line for all N-Queens solvers.
+
+Importing this module has no side effects, so batches of jobs can be driven
+from one process::
+
+    from nQueens import solve
+    solution = solve(64, algorithm="min-conflicts", seed=1)
+
+or from the shell::
+
+    python nQueens.py 64 --algorithm ga --param-set 2 --param mutation_rate=0.1 --seed 1
+
+``solve_distinct()`` (``--distinct K`` on the command line) collects up to K
+solutions that are distinct up to the board's symmetries from independent runs.
+
+Solutions are lists where ``solution[col]`` is the 0-based row of the queen
+in column ``col``; the command line prints them 1-based like the scripts.
+"""
+import argparse
+import ast
+import inspect
+import random
+import sys
+import time
+
+import numpy as np
+
+import nQueen_ACO
+import nQueen_Backtrack
+import nQueen_BEE
+import nQueen_GE
+import nQueen_Hybrid
+import nQueen_MinConflict
+import nQueen_PS0
+from Budget import UNLIMITED, Budget
+from Conflict_count import attacking_pairs
+from Multi_run import run_many
+from Solution_output import FORMATS, SolutionWriter
+from Solution_store import SolutionStore
+from Symmetry import DistinctSolutions
+
+
+def _run_bees(n, params, seed, budget, warm_start):
+    return nQueen_BEE.bees_algorithm(n, **params, budget=budget, warm_start=warm_start)
+
+
+def _run_ga(n, params, seed, budget, warm_start):
+    return nQueen_GE.genetic_algorithm(n, **params, budget=budget, warm_start=warm_start)
+
+
+def _run_pso(n, params, seed, budget, warm_start):
+    params = dict(params)
+    processes = params.pop("processes", None)
+    return nQueen_PS0.PSO(params["num_particles"], n, params["num_iterations"], params["w"], params["c1"], params["c2"],
+                          1, np.arange(n), processes=processes, seed=seed, budget=budget, warm_start=warm_start)[0]
+
+
+def _run_aco(n, params, seed, budget, warm_start):
+    return nQueen_ACO.ACO(n, **params, warm_start=warm_start).run(budget=budget)
+
+
+def _run_hybrid(n, params, seed, budget, warm_start):
+    return nQueen_Hybrid.hybrid(n, **params, seed=seed, budget=budget, warm_start=warm_start)
+
+
+def _run_backtracking(n, params, seed, budget, warm_start):
+    return nQueen_Backtrack.backtracking(n, budget)
+
+
+def _run_min_conflicts(n, params, seed, budget, warm_start):
+    return nQueen_MinConflict.min_conflicts(n, seed=seed, **params, budget=budget)
+
+
+# Stored solutions used to seed a solver when warm starting
+WARM_START_LIMIT = 10
+# Runs made without a budget when warm starting, looking for a class that is not stored yet
+WARM_START_ATTEMPTS = 5
+# Runs made per requested class by solve_distinct() unless told otherwise
+DISTINCT_RUNS_PER_SOLUTION = 10
+# Algorithms whose runs do not depend on the seed, so an unsuccessful run is never repeated
+DETERMINISTIC_ALGORITHMS = frozenset({"backtracking"})
+
+# Arguments the runners supply themselves rather than taking from the parameters
+RUNNER_ARGUMENTS = frozenset({"self", "n", "seed", "budget", "warm_start", "instrumentation"})
+
+
+def _parameter_names(function):
+    """Return the names of the parameters a solver function takes besides the runner's own arguments."""
+    return frozenset(inspect.signature(function).parameters) - RUNNER_ARGUMENTS
+
+
+# Algorithm name -> (bundled parameter sets, runner(n, params, seed, budget, warm_start), accepted parameter names)
+ALGORITHMS = {
+    "bees": (nQueen_BEE.BEE_ALGORITHM_PARAMETER_SETS, _run_bees, _parameter_names(nQueen_BEE.bees_algorithm)),
+    "ga": (nQueen_GE.GA_PARAMETER_SETS, _run_ga, _parameter_names(nQueen_GE.genetic_algorithm)),
+    "pso": (nQueen_PS0.PARAMETER_SETS, _run_pso, frozenset({"num_particles", "num_iterations", "w", "c1", "c2", "processes"})),
+    "aco": (nQueen_ACO.ACO_PARAMETER_SETS, _run_aco, _parameter_names(nQueen_ACO.ACO.__init__)),
+    "hybrid": (nQueen_Hybrid.HYBRID_PARAMETER_SETS, _run_hybrid, _parameter_names(nQueen_Hybrid.hybrid)),
+    "backtracking": ({1: {}}, _run_backtracking, frozenset()),
+    "min-conflicts": ({1: {}}, _run_min_conflicts, _parameter_names(nQueen_MinConflict.min_conflicts)),
+}
+
+
+def resolve_params(algorithm, params=None, parameter_set=1):
+    """Return the bundled parameter set updated with the given overrides.
+
+    Raises ValueError for an unknown algorithm, parameter set or parameter
+    name, so bad input is reported before any solver runs.
+    """
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"Unknown algorithm {algorithm!r}; choose from {sorted(ALGORITHMS)}")
+    parameter_sets, _, accepted = ALGORITHMS[algorithm]
+    if parameter_set not in parameter_sets:
+        raise ValueError(f"Unknown parameter set {parameter_set} for {algorithm}; choose from {sorted(parameter_sets)}")
+    unknown = sorted(set(params or {}) - accepted)
+    if unknown:
+        raise ValueError(f"Unknown parameter(s) {', '.join(unknown)} for {algorithm}; choose from {sorted(accepted)}")
+    resolved = dict(parameter_sets[parameter_set])
+    resolved.update(params or {})
+    return resolved
+
+
+def solve(n, algorithm="ga", params=None, seed=None, time_budget=None, parameter_set=1, max_evaluations=None, anytime=False,
+          store=None, warm_start=False):
+    """Solve the n-queens problem and return a solution, or None if none was found.
+
+    ``params`` overrides entries of the bundled ``parameter_set``. With a
+    ``time_budget`` in seconds or a ``max_evaluations`` limit, the solver loops
+    stop when the budget is spent and unsuccessful runs are repeated with fresh
+    seeds until then; otherwise one run is made. With ``anytime`` the best board
+    found is returned even when it still has attacking queens. Runs are not
+    repeated for deterministic algorithms or after a run that scored no boards.
+
+    With a SolutionStore, a stored solution for n is returned immediately, or,
+    with ``warm_start``, boards close to stored solutions seed the solver's
+    initial population and solutions of classes already stored do not end the
+    search: runs continue until a new class is found, the budget is spent or,
+    without a budget, WARM_START_ATTEMPTS runs were made (a stored class is then
+    returned). Any new solution is added to the store.
+    """
+    if n < 1:
+        raise ValueError("Board size must be a positive integer.")
+    resolved = resolve_params(algorithm, params, parameter_set)
+    if n in (2, 3):
+        return None  # No solutions exist
+    runner = ALGORITHMS[algorithm][1]
+    warm_boards = None
+    if store is not None:
+        if not warm_start:
+            stored = store.get(n)
+            if stored is not None:
+                return stored
+        else:
+            warm_boards = store.solutions(n, limit=WARM_START_LIMIT) or None
+    limited = (time_budget is not None or max_evaluations is not None) and algorithm not in DETERMINISTIC_ALGORITHMS
+    budget = Budget(time_budget, max_evaluations, target_cost=0, anytime=anytime)
+
+    best = None
+    best_cost = None
+    repeated = None  # First solution found whose class was already stored
+    attempt = 0
+    # One child seed per attempt, the same ones Multi_run.run_seeds() derives
+    seed_sequence = np.random.SeedSequence(seed) if seed is not None else None
+    while True:
+        run_seed = None
+        if seed_sequence is not None:
+            run_seed = int(seed_sequence.spawn(1)[0].generate_state(1)[0])
+            random.seed(run_seed)
+            np.random.seed(run_seed)
+        evaluations_before = budget.evaluations
+        solution = runner(n, resolved, run_seed, budget, warm_boards)
+        if solution is not None:
+            cost = attacking_pairs(solution)
+            if cost == 0 and warm_boards and solution in store:
+                repeated = repeated or [int(row) for row in solution]
+            elif best_cost is None or cost < best_cost:
+                best = [int(row) for row in solution]
+                best_cost = cost
+        attempt += 1
+        searching = limited or (repeated is not None and attempt < WARM_START_ATTEMPTS)
+        if budget.evaluations == evaluations_before:
+            searching = False  # The run scored nothing, so repeating it cannot help
+        if best_cost == 0 or not searching or budget.exhausted():
+            if best_cost == 0:
+                if store is not None:
+                    store.add(best)
+                return best
+            return repeated or (best if anytime else None)
+
+
+def _distinct_run(algorithm, n, params):
+    """One run for solve_distinct(); its seed is drawn from the generators run_many() seeded."""
+    return ALGORITHMS[algorithm][1](n, params, random.getrandbits(32), UNLIMITED, None)
+
+
+def solve_distinct(n, count, algorithm="ga", params=None, parameter_set=1, runs=None, seed=None, processes=None,
+                   writer=None):
+    """Return up to ``count`` solutions that are distinct up to rotations and reflections of the board.
+
+    Independent runs, ``DISTINCT_RUNS_PER_SOLUTION * count`` by default, are
+    spread over ``processes`` workers as in Multi_run.run_many() and stop once
+    ``count`` classes were found. Each new class is also written to ``writer``
+    (a Solution_output.SolutionWriter) as soon as it is found.
+    """
+    if n < 1:
+        raise ValueError("Board size must be a positive integer.")
+    if count < 1:
+        raise ValueError("The number of distinct solutions must be a positive integer.")
+    resolved = resolve_params(algorithm, params, parameter_set)
+    distinct = DistinctSolutions()
+    for _ in run_many(_distinct_run, runs or DISTINCT_RUNS_PER_SOLUTION * count, args=(algorithm, n, resolved), seed=seed,
+                      processes=processes, target_solutions=count, distinct=distinct, writer=writer):
+        pass
+    return list(distinct)[:count]
+
+
+def _parse_param(text):
+    """Parse a KEY=VALUE command line override, reading VALUE as a Python literal when possible."""
+    key, separator, value = text.partition("=")
+    if not separator:
+        raise argparse.ArgumentTypeError(f"expected KEY=VALUE, got {text!r}")
+    try:
+        value = ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        pass
+    return key, value
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve the N-Queens problem with one of the bundled solvers.")
+    parser.add_argument("n", type=int, help="board size")
+    parser.add_argument("--algorithm", choices=sorted(ALGORITHMS), default="ga")
+    parser.add_argument("--param-set", type=int, default=1, help="bundled parameter set to start from")
+    parser.add_argument("--param", type=_parse_param, action="append", default=[], metavar="KEY=VALUE",
+                        help="override one parameter; may be repeated")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--time-budget", type=float, default=None, help="seconds to keep searching for a solution")
+    parser.add_argument("--max-evaluations", type=int, default=None, help="fitness evaluations to keep searching for")
+    parser.add_argument("--anytime", action="store_true", help="print the best board found even if it is not a solution")
+    parser.add_argument("--store", default=None, metavar="PATH", help="SQLite solution store to answer from and record into")
+    parser.add_argument("--warm-start", action="store_true", help="seed the solver with stored solutions instead of answering from the store")
+    parser.add_argument("--distinct", type=int, default=None, metavar="K",
+                        help="collect K solutions that are distinct up to symmetry from independent runs")
+    parser.add_argument("--runs", type=int, default=None,
+                        help=f"runs made for --distinct (default {DISTINCT_RUNS_PER_SOLUTION} per solution)")
+    parser.add_argument("--processes", type=int, default=None, help="worker processes for --distinct (default all cores)")
+    parser.add_argument("--output", default=None, metavar="PATH",
+                        help="also write the solution as a record to PATH ('-' for standard output)")
+    parser.add_argument("--format", choices=FORMATS, default="jsonl", help="record format for --output")
+    parser.add_argument("--show-board", action="store_true", help="draw the board after solving")
+    parser.add_argument("--window", type=int, default=None, metavar="SIZE",
+                        help="draw at most SIZE x SIZE squares of the board (default 32)")
+    args = parser.parse_args(argv)
+
+    # Only bad command line input is a usage error; exceptions raised by the solvers propagate
+    if args.n < 1:
+        parser.error("Board size must be a positive integer.")
+    if args.distinct is not None and args.distinct < 1:
+        parser.error("--distinct must be a positive integer.")
+    if args.distinct is not None and (args.store or args.time_budget is not None or args.max_evaluations is not None
+                                      or args.anytime):
+        parser.error("--distinct cannot be combined with --store, --time-budget, --max-evaluations or --anytime.")
+    try:
+        resolve_params(args.algorithm, dict(args.param), args.param_set)
+    except ValueError as error:
+        parser.error(str(error))
+
+    if args.distinct is not None:
+        return _main_distinct(args)
+
+    store = SolutionStore(args.store) if args.store else None
+    start_time = time.perf_counter()
+    try:
+        solution = solve(args.n, args.algorithm, dict(args.param), args.seed, args.time_budget, args.param_set,
+                         args.max_evaluations, args.anytime, store, args.warm_start)
+    finally:
+        if store is not None:
+            store.close()
+    elapsed_time = time.perf_counter() - start_time
+
+    if solution is None:
+        print("No solution found.")
+        print(f"Elapsed time: {elapsed_time:.2f} seconds.")
+        return 1
+    if args.output is not None:
+        with SolutionWriter(args.output, args.format) as writer:
+            writer.write(solution, algorithm=args.algorithm, seed=args.seed, elapsed=round(elapsed_time, 6),
+                         valid=attacking_pairs(solution) == 0)
+        if args.output == "-":
+            return 0
+        # The rows are in the file; only summarise them here
+        label = "Solution" if attacking_pairs(solution) == 0 else "Best board found"
+        print(f"{label} for n={len(solution)} written to {args.output}")
+    else:
+        label = "Solution:" if attacking_pairs(solution) == 0 else "Best board found:"
+        print(label, [row + 1 for row in solution])
+    if args.show_board:
+        from Validity_check import DISPLAY_WINDOW, display_solution
+        display_solution([row + 1 for row in solution], window=args.window or DISPLAY_WINDOW)
+    print(f"Elapsed time: {elapsed_time:.2f} seconds.")
+    return 0
+
+
+def _main_distinct(args):
+    """Command line --distinct: print or write each new class as it is found, then summarise.
+
+    When the records go to standard output the summary goes to stderr, so the
+    records stay readable by Solution_output in either format.
+    """
+    target = args.output or "-"
+    start_time = time.perf_counter()
+    with SolutionWriter(target, args.format) as writer:
+        solutions = solve_distinct(args.n, args.distinct, args.algorithm, dict(args.param), args.param_set, args.runs,
+                                   args.seed, args.processes, writer)
+    elapsed_time = time.perf_counter() - start_time
+    summary = sys.stderr if target == "-" else sys.stdout
+    print(f"Found {len(solutions)} of {args.distinct} distinct solutions (up to symmetry) for n={args.n}.", file=summary)
+    print(f"Elapsed time: {elapsed_time:.2f} seconds.", file=summary)
+    return 0 if len(solutions) == args.distinct else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())